@@ -7,13 +7,14 @@ NO TEMPLATES - every message is contextually generated.
 """
 
 import asyncio
-import json
 import logging
 from typing import Dict, Optional, Callable, Any, List
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 
+import orjson
+
 from .negotiation_state import NegotiationState, NegotiationStatus
 from .negotiation_strategy import StrategySelector, NegotiationStrategy
 from .prompts.negotiation import build_system_prompt, build_mode_prompt, build_context_block
@@ -304,7 +305,7 @@ def parse_state_update(text: str) -> Optional[Dict]:
     if "[STATE_UPDATE]" in text:
         try:
             json_str = text.split("[STATE_UPDATE]")[1].strip()
-            return json.loads(json_str)
-        except (IndexError, json.JSONDecodeError):
+            return orjson.loads(json_str)
+        except (IndexError, orjson.JSONDecodeError):
             pass
     return None
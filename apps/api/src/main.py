@@ -12,7 +12,12 @@ from fastapi.responses import HTMLResponse
 from contextlib import asynccontextmanager
 import logging
 
-from src.db import init_db, close_db
+from src.db import init_db, close_db, get_pg_pool_stats
+from src.services.browser.mcp_client import (
+    close_session as close_browser_session,
+    pause_navigation,
+    resume_navigation,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -34,6 +39,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down Deal Scout API...")
+    await close_browser_session()
     await close_db()
 
 
@@ -63,6 +69,34 @@ async def health_check():
     }
 
 
+@app.get("/health/db")
+async def db_health_check():
+    """Database pool health - reports connection pool saturation"""
+    try:
+        pool = get_pg_pool_stats()
+    except RuntimeError as e:
+        return {"status": "unavailable", "error": str(e)}
+    
+    return {
+        "status": "saturated" if pool["idle"] == 0 and pool["size"] >= pool["max_size"] else "healthy",
+        "pool": pool
+    }
+
+
+@app.post("/browser/pause")
+async def pause_browser():
+    """Hold new scraper navigations, e.g. while taking over the debug Chrome window"""
+    pause_navigation()
+    return {"status": "paused"}
+
+
+@app.post("/browser/resume")
+async def resume_browser():
+    """Let held and new scraper navigations proceed"""
+    resume_navigation()
+    return {"status": "resumed"}
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
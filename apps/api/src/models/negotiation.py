@@ -4,6 +4,7 @@ from pydantic import BaseModel, Field
 from enum import Enum
 from datetime import datetime
 from typing import List, Dict, Any, Optional
+from .listing import Listing
 
 
 class NegotiationState(str, Enum):
@@ -45,6 +46,9 @@ class Negotiation(BaseModel):
     created_at: datetime
     updated_at: datetime
     
+    # Associated listing (joined in the same query)
+    listing: Optional[Listing] = None
+    
     # Computed fields
     suggested_offer: Optional[int] = None
     suggested_message: Optional[str] = None
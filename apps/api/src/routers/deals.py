@@ -2,13 +2,17 @@
 Deal routes for scored listings.
 """
 
+import hashlib
 import logging
+import orjson
 from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
 
 from src.models import Deal, Listing, DealRating
 from src.services.reseller import DealScorer, HotDealDetector
-from src.db import get_pg_pool
+from src.db import get_pg_pool, get_redis
+from src.services.browser import MarketplaceScraper
+from src.services.enhanced_deal_viewer import EnhancedDealViewer
 
 logger = logging.getLogger(__name__)
 
@@ -53,24 +57,13 @@ async def list_deals(
             for row in rows
         ]
         
-        # Score all listings
+        # Score all listings (batched LLM calls, run concurrently)
         scorer = DealScorer()
-        deals = []
+        deals = await scorer.score_listings_async(listings)
         
-        for listing in listings:
-            try:
-                deal = scorer.score_listing(listing)
-                
-                # Apply rating filter
-                if rating:
-                    if deal.deal_rating.value == rating.upper():
-                        deals.append(deal)
-                else:
-                    deals.append(deal)
-                    
-            except Exception as e:
-                logger.error(f"Failed to score listing {listing.id}: {e}")
-                continue
+        # Apply rating filter
+        if rating:
+            deals = [d for d in deals if d.deal_rating.value == rating.upper()]
         
         # Sort by rating and profit
         deals.sort(
@@ -123,7 +116,7 @@ async def get_deal(listing_id: str):
         
         # Score it
         scorer = DealScorer()
-        deal = scorer.score_listing(listing)
+        deal = (await scorer.score_listings_async([listing]))[0]
         
         return deal
         
@@ -233,14 +226,7 @@ async def view_deal(
     
     Example: POST /api/deals/view?url=https://facebook.com/marketplace/item/123456
     """
-    import json
-    import hashlib
-    from src.db import get_redis
-    
     try:
-        from src.services.enhanced_deal_viewer import EnhancedDealViewer
-        from src.services.browser import MarketplaceScraper
-        
         logger.info(f"Viewing deal: {url}")
         
         # Check Redis cache first
@@ -250,7 +236,7 @@ async def view_deal(
             cached = await redis_client.get(cache_key)
             if cached:
                 logger.info(f"Cache hit for deal: {url}")
-                return json.loads(cached)
+                return orjson.loads(cached)
         except Exception as e:
             logger.warning(f"Redis cache check failed: {e}")
         
@@ -285,7 +271,7 @@ async def view_deal(
             if 'analysis' in cache_result and 'rating' in cache_result['analysis']:
                 if hasattr(cache_result['analysis']['rating'], 'value'):
                     cache_result['analysis']['rating'] = cache_result['analysis']['rating'].value
-            await redis_client.setex(cache_key, 3600, json.dumps(cache_result))
+            await redis_client.setex(cache_key, 3600, orjson.dumps(cache_result))
             logger.info(f"Cached deal analysis for 1 hour: {url}")
         except Exception as e:
             logger.warning(f"Failed to cache deal analysis: {e}")
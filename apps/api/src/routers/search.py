@@ -2,13 +2,15 @@
 Search routes for Facebook Marketplace.
 """
 
+import asyncio
 import logging
 import time
 from fastapi import APIRouter, HTTPException
 from typing import List
 
-from src.models import SearchQuery, SearchResult, Listing
-from src.services.search import SearchOrchestrator
+from src.models import SearchQuery, SearchResult, Listing, Deal, DealRating
+from src.services.search import SearchOrchestrator, QueryGenerator
+from src.services.ebay import DealAnalyzer
 from src.services.browser import MarketplaceScraper
 from src.db import get_pg_pool
 
@@ -16,6 +18,12 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Listings analyzed in parallel per search (bounds eBay/LLM fan-out)
+MAX_CONCURRENT_ANALYSES = 5
+
+# Result ordering: best rating first
+RATING_ORDER = {'HOT': 0, 'GOOD': 1, 'FAIR': 2, 'PASS': 3}
+
 
 @router.post("/search", response_model=SearchResult)
 async def search_marketplace(query: SearchQuery):
@@ -33,16 +41,25 @@ async def search_marketplace(query: SearchQuery):
     orchestrator = SearchOrchestrator()
     
     try:
+        # Start preparing the search (LLM query variations + URLs) while the
+        # cache is checked, so a miss doesn't pay for the two in series
+        prep_task = asyncio.create_task(orchestrator.prepare_search(query))
+        
         # Check cache first
-        cached_result = await orchestrator.check_cache(query)
+        try:
+            cached_result = await orchestrator.check_cache(query)
+        except BaseException:
+            prep_task.cancel()
+            raise
         if cached_result:
+            prep_task.cancel()
             cached_result.cached = True
             cached_result.search_time_ms = (time.time() - start_time) * 1000
             logger.info(f"Cache hit for query: {query.query}")
             return cached_result
         
         # Prepare search (generate variations and URLs)
-        search_prep = await orchestrator.prepare_search(query)
+        search_prep = await prep_task
         logger.info(f"Generated {len(search_prep['query_variations'])} variations")
         
         # Scrape each URL
@@ -63,47 +80,45 @@ async def search_marketplace(query: SearchQuery):
         logger.info(f"Deduplicated to {len(unique_listings)} unique listings")
         
         # Score listings using eBay price comparison
-        from src.services.ebay import DealAnalyzer
-        from src.services.reseller import HotDealDetector
-        from src.models import Deal, DealRating
-        
         # Check database for existing analyzed deals (avoid re-analyzing)
         pool = get_pg_pool()
         listing_ids = [l.id for l in unique_listings]
         existing_deals = {}
         
-        async with pool.acquire() as conn:
-            rows = await conn.fetch("""
-                SELECT l.*, d.ebay_avg_price, d.profit_estimate, d.roi_percent,
-                       d.deal_rating, d.why_standout, d.category, d.match_score
-                FROM listings l
-                JOIN deals d ON l.id = d.listing_id
-                WHERE l.id = ANY($1)
-            """, listing_ids)
+        # Nothing scraped - skip the database round-trip entirely
+        if listing_ids:
+            async with pool.acquire() as conn:
+                rows = await conn.fetch("""
+                    SELECT l.*, d.ebay_avg_price, d.profit_estimate, d.roi_percent,
+                           d.deal_rating, d.why_standout, d.category, d.match_score
+                    FROM listings l
+                    JOIN deals d ON l.id = d.listing_id
+                    WHERE l.id = ANY($1)
+                """, listing_ids)
             
-            for row in rows:
-                existing_deals[row['id']] = Deal(
-                    id=row['id'],
-                    title=row['title'],
-                    price=row['price'],
-                    price_value=row['price_value'],
-                    location=row['location'],
-                    image_url=row['image_url'],
-                    url=row['url'],
-                    seller_name=row['seller_name'],
-                    scraped_at=row['scraped_at'],
-                    created_at=row['created_at'],
-                    ebay_avg_price=row['ebay_avg_price'],
-                    profit_estimate=row['profit_estimate'],
-                    roi_percent=row['roi_percent'],
-                    deal_rating=DealRating(row['deal_rating']),
-                    is_new=False,
-                    price_changed=False,
-                    old_price=None,
-                    why_standout=row['why_standout'],
-                    category=row['category'],
-                    match_score=row['match_score']
-                )
+                for row in rows:
+                    existing_deals[row['id']] = Deal(
+                        id=row['id'],
+                        title=row['title'],
+                        price=row['price'],
+                        price_value=row['price_value'],
+                        location=row['location'],
+                        image_url=row['image_url'],
+                        url=row['url'],
+                        seller_name=row['seller_name'],
+                        scraped_at=row['scraped_at'],
+                        created_at=row['created_at'],
+                        ebay_avg_price=row['ebay_avg_price'],
+                        profit_estimate=row['profit_estimate'],
+                        roi_percent=row['roi_percent'],
+                        deal_rating=DealRating(row['deal_rating']),
+                        is_new=False,
+                        price_changed=False,
+                        old_price=None,
+                        why_standout=row['why_standout'],
+                        category=row['category'],
+                        match_score=row['match_score']
+                    )
         
         logger.info(f"Found {len(existing_deals)} existing analyzed deals in database")
         
@@ -118,8 +133,9 @@ async def search_marketplace(query: SearchQuery):
         if len(listings_to_analyze) > max_to_score:
             logger.info(f"Limiting new analyses to {max_to_score} out of {len(listings_to_analyze)} listings")
             listings_to_analyze = listings_to_analyze[:max_to_score]
-        analyzer = DealAnalyzer()
-        hot_deal_detector = HotDealDetector()
+        # DealAnalyzer builds eBay and Anthropic clients - only pay for that
+        # when there is something new to analyze
+        analyzer = DealAnalyzer() if listings_to_analyze else None
         
         # Start with existing deals from database
         deals = list(existing_deals.values())
@@ -152,29 +168,38 @@ async def search_marketplace(query: SearchQuery):
                 })
                 return Deal(**listing_data)
             except Exception as e:
-                logger.error(f"Failed to analyze listing {listing.id}: {e}")
+                logger.error("Failed to analyze listing %s: %s", listing.id, e)
                 return None
         
-        # Only analyze NEW listings (not in database)
+        # Only analyze NEW listings (not in database) - concurrently, since
+        # each analysis is mostly waiting on eBay/LLM round-trips
+        analysis_sem = asyncio.Semaphore(MAX_CONCURRENT_ANALYSES)
+        
+        async def analyze_bounded(listing):
+            async with analysis_sem:
+                return await analyze_listing(listing)
+        
+        results = await asyncio.gather(
+            *(analyze_bounded(listing) for listing in listings_to_analyze),
+            return_exceptions=True
+        )
+        
         new_deals = []
-        for listing in listings_to_analyze:
-            try:
-                deal = await analyze_listing(listing)
-                if deal:
-                    new_deals.append(deal)
-                    deals.append(deal)
-            except Exception as e:
-                logger.error(f"Failed to score listing: {e}")
+        for deal in results:
+            if isinstance(deal, Exception):
+                logger.error("Failed to score listing: %s", deal)
+            elif deal:
+                new_deals.append(deal)
+                deals.append(deal)
         
         logger.info(f"Analyzed {len(new_deals)} new listings (total: {len(deals)})")
         
         # Return ALL deals - sort by rating then by profit
         # Include deals even if profit_estimate is None (show them at the end)
-        rating_order = {'HOT': 0, 'GOOD': 1, 'FAIR': 2, 'PASS': 3}
         all_deals = sorted(
             deals,
             key=lambda d: (
-                rating_order.get(d.deal_rating.value if d.deal_rating else 'PASS', 3),
+                RATING_ORDER.get(d.deal_rating.value if d.deal_rating else 'PASS', 3),
                 -(d.profit_estimate if d.profit_estimate is not None else -9999)
             )
         )
@@ -183,10 +208,12 @@ async def search_marketplace(query: SearchQuery):
         # Save NEW data to database (skip existing)
         if new_deals:
             async with pool.acquire() as conn:
-                # Save new listings
-                for listing in listings_to_analyze:
-                    try:
-                        await conn.execute("""
+                # Save new listings and their deals (one batched round-trip
+                # each) in one transaction: a deal can't be stored without its
+                # listing row, so if the listings insert fails neither is kept
+                try:
+                    async with conn.transaction():
+                        await conn.executemany("""
                             INSERT INTO listings (
                                 id, title, price, price_value, location,
                                 image_url, url, seller_name, scraped_at
@@ -194,19 +221,17 @@ async def search_marketplace(query: SearchQuery):
                             VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
                             ON CONFLICT (id) DO UPDATE
                             SET scraped_at = EXCLUDED.scraped_at
-                        """,
-                            listing.id, listing.title, listing.price,
-                            listing.price_value, listing.location,
-                            listing.image_url, listing.url,
-                            listing.seller_name, listing.scraped_at
-                        )
-                    except Exception as e:
-                        logger.error(f"Failed to save listing {listing.id}: {e}")
-                
-                # Save new deals only
-                for deal in new_deals:
-                    try:
-                        await conn.execute("""
+                        """, [
+                            (
+                                listing.id, listing.title, listing.price,
+                                listing.price_value, listing.location,
+                                listing.image_url, listing.url,
+                                listing.seller_name, listing.scraped_at
+                            )
+                            for listing in listings_to_analyze
+                        ])
+                        
+                        await conn.executemany("""
                             INSERT INTO deals (
                                 listing_id, ebay_avg_price, profit_estimate, roi_percent,
                                 deal_rating, why_standout, category, match_score
@@ -220,13 +245,16 @@ async def search_marketplace(query: SearchQuery):
                                 why_standout = EXCLUDED.why_standout,
                                 category = EXCLUDED.category,
                                 match_score = EXCLUDED.match_score
-                        """,
-                            deal.id, deal.ebay_avg_price, deal.profit_estimate,
-                            deal.roi_percent, deal.deal_rating.value,
-                            deal.why_standout, deal.category, deal.match_score
-                        )
-                    except Exception as e:
-                        logger.error(f"Failed to save deal {deal.id}: {e}")
+                        """, [
+                            (
+                                deal.id, deal.ebay_avg_price, deal.profit_estimate,
+                                deal.roi_percent, deal.deal_rating.value,
+                                deal.why_standout, deal.category, deal.match_score
+                            )
+                            for deal in new_deals
+                        ])
+                except Exception as e:
+                    logger.error("Failed to save listings and deals: %s", e)
                 
                 # Save search history
                 await conn.execute("""
@@ -270,11 +298,9 @@ async def get_suggestions(q: str):
     Returns:
         List of suggested queries
     """
-    from src.services.search import QueryGenerator
-    
     try:
         generator = QueryGenerator()
-        variations = generator.generate_variations(q)
+        variations = await generator.generate_variations(q)
         return {"suggestions": variations}
     except Exception as e:
         logger.error(f"Suggestion generation failed: {e}")
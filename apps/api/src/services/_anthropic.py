@@ -0,0 +1,84 @@
+"""
+Shared Anthropic client.
+One client per process so HTTP keep-alive connections and TLS sessions
+are reused across negotiations, scoring and query generation.
+"""
+
+import asyncio
+import os
+from typing import Optional
+import anthropic
+import httpx
+
+# Process-wide cap on in-flight async LLM calls (size to the account's rate tier)
+ANTHROPIC_MAX_CONCURRENCY = int(os.getenv("ANTHROPIC_MAX_CONCURRENCY", "8"))
+
+_client: Optional[anthropic.Anthropic] = None
+_async_client: Optional[anthropic.AsyncAnthropic] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def get_client() -> Optional[anthropic.Anthropic]:
+    """
+    Get the shared Anthropic client.
+    
+    Returns:
+        Anthropic client, or None if ANTHROPIC_API_KEY is not set
+    """
+    global _client
+    
+    if _client is None:
+        api_key = os.getenv("ANTHROPIC_API_KEY")
+        if not api_key:
+            return None
+        
+        _client = anthropic.Anthropic(
+            api_key=api_key,
+            max_retries=2,
+            timeout=15.0,
+            http_client=httpx.Client(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+            )
+        )
+    
+    return _client
+
+
+def get_async_client() -> Optional[anthropic.AsyncAnthropic]:
+    """
+    Get the shared async Anthropic client.
+    
+    Returns:
+        AsyncAnthropic client, or None if ANTHROPIC_API_KEY is not set
+    """
+    global _async_client
+    
+    if _async_client is None:
+        api_key = os.getenv("ANTHROPIC_API_KEY")
+        if not api_key:
+            return None
+        
+        # SDK retries honor retry-after on 429/529 with exponential backoff
+        _async_client = anthropic.AsyncAnthropic(
+            api_key=api_key,
+            max_retries=3,
+            timeout=15.0,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+            )
+        )
+    
+    return _async_client
+
+
+def get_llm_semaphore() -> asyncio.Semaphore:
+    """
+    Get the process-wide semaphore bounding concurrent async LLM calls.
+    Created lazily so it binds to the running event loop.
+    """
+    global _semaphore
+    
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(ANTHROPIC_MAX_CONCURRENCY)
+    
+    return _semaphore
@@ -1,7 +1,10 @@
 """Browser automation services"""
 
-from .mcp_client import ChromeMCPClient
+from .mcp_client import ChromeMCPClient, pause_navigation, resume_navigation
 from .extractor import ListingExtractor
 from .scraper import MarketplaceScraper
 
-__all__ = ["ChromeMCPClient", "ListingExtractor", "MarketplaceScraper"]
+__all__ = [
+    "ChromeMCPClient", "ListingExtractor", "MarketplaceScraper",
+    "pause_navigation", "resume_navigation"
+]
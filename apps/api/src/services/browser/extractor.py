@@ -12,6 +12,9 @@ from src.models import Listing
 
 logger = logging.getLogger(__name__)
 
+# Compiled once - run on every extracted listing
+_PRICE_PREFIX_RE = re.compile(r'(\$[\d,]+)')
+
 
 class ListingExtractor:
     """Optimized listing extraction with single DOM query."""
@@ -150,14 +153,19 @@ class ListingExtractor:
                 # Remove the year from the end
                 clean = clean[:-4]
         
-        # Extract the price
-        match = re.search(r'\d+', clean)
-        if match:
-            try:
-                return int(match.group())
-            except ValueError:
-                return None
-        return None
+        # Extract the price - the first run of digits, found with a plain
+        # character scan; on strings this short the regex engine costs more
+        # than the work it does
+        start = 0
+        end = len(clean)
+        while start < end and not clean[start].isdecimal():
+            start += 1
+        stop = start
+        while stop < end and clean[stop].isdecimal():
+            stop += 1
+        if stop == start:
+            return None
+        return int(clean[start:stop])
     
     def clean_price_string(self, price_str: str) -> str:
         """Clean price string by removing year contamination."""
@@ -165,7 +173,7 @@ class ListingExtractor:
             return price_str
         
         # Extract just the price part
-        match = re.match(r'(\$[\d,]+)', price_str)
+        match = _PRICE_PREFIX_RE.match(price_str)
         if match:
             price_part = match.group(1)
             clean_num = price_part.replace('$', '').replace(',', '')
@@ -214,7 +222,7 @@ class ListingExtractor:
                 listing = self.create_listing_from_data(data)
                 listings.append(listing)
             except Exception as e:
-                logger.error(f"Failed to create listing from data: {e}")
+                logger.error("Failed to create listing from data: %s", e)
                 continue
         
         logger.info(f"Extracted {len(listings)} listings")
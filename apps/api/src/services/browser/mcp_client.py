@@ -13,12 +13,195 @@ import asyncio
 import json
 import logging
 import os
+import functools
 import random
-from typing import Any, Optional, Set
+import time
+from typing import Any, Dict, FrozenSet, List, Optional
 import aiohttp
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# Feature flags - parsed once at import
+ENABLE_RESOURCE_BLOCKING = os.getenv("ENABLE_RESOURCE_BLOCKING", "true") == "true"
+AUTO_DISMISS_MODALS = os.getenv("AUTO_DISMISS_MODALS", "true") == "true"
+
+
+# Scripts are built once per distinct argument set and reused verbatim
+_SCROLL_TO_BOTTOM_SCRIPT = "window.scrollTo(0, document.body.scrollHeight)"
+_PAGE_HTML_SCRIPT = "document.documentElement.outerHTML"
+
+# Registered with Page.addScriptToEvaluateOnNewDocument so the page closes
+# Facebook's login/cookie dialogs itself as they appear - no per-page
+# dismiss round-trip. Mutations are coalesced to one check per frame.
+_MODAL_AUTODISMISS_SCRIPT = """
+(() => {
+    const CLOSE_SELECTORS = [
+        '[role="dialog"] [aria-label="Close"]',
+        '[data-testid="modal_close_button"]'
+    ];
+    let pending = false;
+    const dismiss = () => {
+        pending = false;
+        if (!document.querySelector('[role="dialog"]')) return;
+        // Separate querySelector calls stop at the first match instead of
+        // materializing a NodeList - the selectors rarely coexist
+        for (const sel of CLOSE_SELECTORS) {
+            const btn = document.querySelector(sel);
+            if (btn && btn.offsetParent !== null) { btn.click(); return; }
+        }
+    };
+    const schedule = () => {
+        if (!pending) { pending = true; requestAnimationFrame(dismiss); }
+    };
+    const start = () => {
+        new MutationObserver(schedule).observe(document.body, { childList: true, subtree: true });
+        schedule();
+    };
+    if (document.body) start();
+    else document.addEventListener('DOMContentLoaded', start);
+})();
+"""
+
+
+@functools.lru_cache(maxsize=64)
+def _wait_for_selector_script(selector: str, timeout_ms: int) -> str:
+    """JS promise resolving true once selector matches, false after timeout_ms."""
+    return f'''
+        new Promise((resolve) => {{
+            const timeout = setTimeout(() => resolve(false), {timeout_ms});
+            const check = () => {{
+                const el = document.querySelector('{selector}');
+                if (el) {{
+                    clearTimeout(timeout);
+                    resolve(true);
+                }} else {{
+                    requestAnimationFrame(check);
+                }}
+            }};
+            check();
+        }})
+    '''
+
+
+@functools.lru_cache(maxsize=64)
+def _count_script(selector: str) -> str:
+    """JS expression counting elements matching selector."""
+    return f"document.querySelectorAll('{selector}').length"
+
+
+@functools.lru_cache(maxsize=64)
+def _network_idle_script(idle_time_ms: int, timeout_ms: int) -> str:
+    """JS promise resolving true once no resources have loaded for idle_time_ms."""
+    return f'''
+        new Promise((resolve) => {{
+            let lastActivity = Date.now();
+            let resolved = false;
+            
+            const observer = new PerformanceObserver((list) => {{
+                lastActivity = Date.now();
+            }});
+            try {{ observer.observe({{ entryTypes: ['resource'] }}); }} catch(e) {{}}
+            
+            const check = setInterval(() => {{
+                if (Date.now() - lastActivity > {idle_time_ms}) {{
+                    clearInterval(check);
+                    try {{ observer.disconnect(); }} catch(e) {{}}
+                    if (!resolved) {{ resolved = true; resolve(true); }}
+                }}
+            }}, 100);
+            
+            setTimeout(() => {{
+                clearInterval(check);
+                try {{ observer.disconnect(); }} catch(e) {{}}
+                if (!resolved) {{ resolved = true; resolve(false); }}
+            }}, {timeout_ms});
+        }})
+    '''
+
+
+# One HTTP session (and connection pool) shared by every client in the process
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """Get the shared DevTools HTTP session, creating it on first use."""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession()
+    return _session
+
+
+async def close_session():
+    """Close the shared DevTools HTTP session (call on shutdown)."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+# Page target WebSocket URL per DevTools endpoint - every call drives the same
+# long-lived tab, so /json is only listed again after that tab goes away
+_target_ws_urls: Dict[str, str] = {}
+
+
+# Set while navigation is allowed; cleared by pause_navigation()
+_navigation_gate: Optional[asyncio.Event] = None
+
+
+def _get_navigation_gate() -> asyncio.Event:
+    """Get the shared navigation gate, creating it (open) on first use."""
+    global _navigation_gate
+    if _navigation_gate is None:
+        _navigation_gate = asyncio.Event()
+        _navigation_gate.set()
+    return _navigation_gate
+
+
+def pause_navigation():
+    """
+    Hold all new navigations until resume_navigation().
+    
+    For when the operator backgrounds or takes over the debug Chrome window -
+    a hidden tab throttles timers and animation frames, so scraping it burns
+    Facebook rate-limit budget on waits that time out.
+    """
+    _get_navigation_gate().clear()
+    logger.info("Browser navigation paused")
+
+
+def resume_navigation():
+    """Let held and new navigations proceed."""
+    _get_navigation_gate().set()
+    logger.info("Browser navigation resumed")
+
+
+def _track_request(in_flight: set, data: dict) -> bool:
+    """Update the in-flight request set from a Network event; False if data isn't one."""
+    method = data.get("method")
+    if method == "Network.requestWillBeSent":
+        in_flight.add(data["params"]["requestId"])
+    elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+        in_flight.discard(data["params"]["requestId"])
+    else:
+        return False
+    return True
+
+
+async def _send(ws: aiohttp.ClientWebSocketResponse, command: dict):
+    """Send a CDP command, encoded with orjson rather than the stdlib json."""
+    await ws.send_str(orjson.dumps(command).decode())
+
+
+def _read_json(path: str) -> Any:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _write_json(path: str, data: Any):
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
 
 class ChromeMCPClient:
     """
@@ -27,16 +210,16 @@ class ChromeMCPClient:
     """
     
     # Resource types to block for faster loading
-    BLOCKED_RESOURCE_TYPES: Set[str] = {
+    BLOCKED_RESOURCE_TYPES: FrozenSet[str] = frozenset({
         'image', 'font', 'media', 'beacon', 'csp_report', 'texttrack'
-    }
+    })
     
     # URL patterns to block (analytics, tracking)
-    BLOCKED_URL_PATTERNS = [
+    BLOCKED_URL_PATTERNS = (
         'google-analytics', 'googletagmanager', 'facebook.com/tr',
         'doubleclick', 'adzerk', 'analytics', 'hotjar', 'mixpanel',
         'segment.io', 'amplitude', 'fullstory', 'mouseflow'
-    ]
+    )
     
     def __init__(self, mcp_endpoint: str = "http://localhost:9222"):
         self.endpoint = mcp_endpoint
@@ -45,7 +228,8 @@ class ChromeMCPClient:
         self._msg_id = 0
         
         # Feature flags
-        self.enable_resource_blocking = os.getenv("ENABLE_RESOURCE_BLOCKING", "true") == "true"
+        self.enable_resource_blocking = ENABLE_RESOURCE_BLOCKING
+        self.auto_dismiss_modals = AUTO_DISMISS_MODALS
     
     def _next_id(self) -> int:
         """Get next message ID."""
@@ -53,18 +237,56 @@ class ChromeMCPClient:
         return self._msg_id
     
     async def _get_ws_url(self, session: aiohttp.ClientSession) -> Optional[str]:
-        """Get WebSocket URL for the page target."""
+        """Get WebSocket URL for the page target (cached until it stops answering)."""
+        ws_url = _target_ws_urls.get(self.endpoint)
+        if ws_url:
+            return ws_url
+        
         try:
             async with session.get(f"{self.endpoint}/json", timeout=aiohttp.ClientTimeout(total=5)) as resp:
                 targets = await resp.json()
                 if not targets:
                     return None
                 target = next((t for t in targets if t['type'] == 'page'), targets[0])
-                return target['webSocketDebuggerUrl']
+                ws_url = target['webSocketDebuggerUrl']
+                _target_ws_urls[self.endpoint] = ws_url
+                return ws_url
         except Exception as e:
-            logger.error(f"Failed to get WebSocket URL: {e}")
+            logger.error("Failed to get WebSocket URL: %s", e)
             return None
     
+    def _forget_target(self):
+        """Drop the cached target so the next call lists /json again."""
+        _target_ws_urls.pop(self.endpoint, None)
+    
+    async def _connect(
+        self,
+        session: aiohttp.ClientSession,
+        timeout: float = 10.0
+    ) -> Optional[aiohttp.ClientWebSocketResponse]:
+        """
+        Open a DevTools socket to the cached page target.
+        
+        If the cached tab has gone away (closed, or Chrome restarted while
+        we were idle) the target is looked up again and the connect retried
+        once here, rather than failing this call and fixing it on the next.
+        
+        Returns:
+            Connected socket, or None if Chrome has no targets
+        """
+        ws_url = await self._get_ws_url(session)
+        if not ws_url:
+            return None
+        try:
+            return await session.ws_connect(ws_url, timeout=timeout)
+        except aiohttp.ClientError:
+            self._forget_target()
+        
+        ws_url = await self._get_ws_url(session)
+        if not ws_url:
+            return None
+        return await session.ws_connect(ws_url, timeout=timeout)
+    
     async def navigate(self, url: str, wait_for: str = "domcontentloaded") -> bool:
         """
         Navigate to URL with smart waiting.
@@ -74,93 +296,184 @@ class ChromeMCPClient:
             wait_for: Wait strategy:
                 - "domcontentloaded": Wait for DOM (fastest)
                 - "load": Wait for all resources
-                - "networkidle": Wait for network to be idle
+                - "networkidle": No requests in flight for 500ms (networkidle0)
+                - "networkidle2": At most 2 requests in flight for 500ms -
+                  Puppeteer's heuristic for pages that keep a long-poll or
+                  analytics connection open, which Marketplace does; "load"
+                  fires before the listing cards hydrate
                 - CSS selector: Wait for specific element
         """
         try:
-            logger.info(f"Navigating to: {url}")
+            # Held here while paused - nothing is sent to Chrome meanwhile
+            await _get_navigation_gate().wait()
             
-            async with aiohttp.ClientSession() as session:
-                ws_url = await self._get_ws_url(session)
-                if not ws_url:
-                    logger.error("No Chrome targets available")
-                    return False
+            logger.info("Navigating to: %s", url)
+            
+            session = _get_session()
+            ws = await self._connect(session, timeout=30)
+            if ws is None:
+                logger.error("No Chrome targets available")
+                return False
+            
+            async with ws:
+                # Enable required domains and navigate in one pipelined burst -
+                # CDP handles commands in order, so there's no need to wait
+                # for each enable before sending the next command
+                commands = [
+                    {"id": self._next_id(), "method": "Page.enable"},
+                    {"id": self._next_id(), "method": "Network.enable"},
+                ]
                 
-                async with session.ws_connect(ws_url, timeout=30) as ws:
-                    # Enable required domains
-                    await ws.send_json({"id": self._next_id(), "method": "Page.enable"})
-                    await asyncio.wait_for(ws.receive(), timeout=5)
-                    
-                    await ws.send_json({"id": self._next_id(), "method": "Network.enable"})
-                    await asyncio.wait_for(ws.receive(), timeout=5)
-
-                    # Navigate
-                    nav_id = self._next_id()
-                    await ws.send_json({
-                        "id": nav_id,
-                        "method": "Page.navigate",
-                        "params": {"url": url}
+                # Registration lives as long as this DevTools session, so it
+                # rides along in the same burst rather than costing a round-trip
+                if self.auto_dismiss_modals:
+                    commands.append({
+                        "id": self._next_id(),
+                        "method": "Page.addScriptToEvaluateOnNewDocument",
+                        "params": {"source": _MODAL_AUTODISMISS_SCRIPT}
                     })
-                    
-                    # Wait for navigation response
-                    response = await asyncio.wait_for(ws.receive(), timeout=15)
-                    result = json.loads(response.data)
-                    
-                    if "error" in result:
-                        logger.error(f"Navigation error: {result['error']}")
-                        return False
-                    
-                    # Smart wait based on strategy
-                    if wait_for == "domcontentloaded":
-                        # Quick wait for DOM - much faster than full load
-                        await asyncio.sleep(0.5)
-                    elif wait_for == "load":
-                        await asyncio.sleep(2)
-                    elif wait_for == "networkidle":
-                        await asyncio.sleep(1)
-                    elif wait_for.startswith('.') or wait_for.startswith('#') or wait_for.startswith('['):
-                        # CSS selector - wait for element
-                        await self._wait_for_selector_internal(ws, wait_for, timeout_ms=10000)
-                    else:
-                        await asyncio.sleep(1)
-                    
-                    self.current_url = url
-                    logger.info(f"Successfully navigated to {url}")
-                    return True
-                    
+                
+                nav_id = self._next_id()
+                commands.append({"id": nav_id, "method": "Page.navigate", "params": {"url": url}})
+                for command in commands:
+                    await _send(ws, command)
+                
+                # Wait for navigation response (skipping enable replies and
+                # events). Requests the navigation starts before its reply -
+                # the document itself and the first subresources - are
+                # counted here, so the network-idle wait below sees them.
+                in_flight = set()
+                result = await self._receive_reply(ws, nav_id, timeout=15, in_flight=in_flight)
+                
+                if "error" in result:
+                    logger.error("Navigation error: %s", result['error'])
+                    return False
+                
+                # Smart wait based on strategy
+                if wait_for == "domcontentloaded":
+                    # Quick wait for DOM - much faster than full load
+                    await asyncio.sleep(0.5)
+                elif wait_for == "load":
+                    await asyncio.sleep(2)
+                elif wait_for == "networkidle":
+                    await self._wait_for_network_idle_internal(
+                        ws, idle_connections=0, timeout_ms=3000, in_flight=in_flight
+                    )
+                elif wait_for == "networkidle2":
+                    await self._wait_for_network_idle_internal(
+                        ws, idle_connections=2, timeout_ms=3000, in_flight=in_flight
+                    )
+                elif wait_for.startswith('.') or wait_for.startswith('#') or wait_for.startswith('['):
+                    # CSS selector - wait for element
+                    await self._wait_for_selector_internal(ws, wait_for, timeout_ms=10000)
+                else:
+                    await asyncio.sleep(1)
+                
+                self.current_url = url
+                logger.info("Successfully navigated to %s", url)
+                return True
+                
         except asyncio.TimeoutError:
-            logger.error(f"Navigation timed out for {url}")
+            logger.error("Navigation timed out for %s", url)
+            return False
+        except aiohttp.ClientError as e:
+            # Tab closed or Chrome restarted - pick a fresh target next time
+            self._forget_target()
+            logger.error("Navigation failed: %s", e)
             return False
         except Exception as e:
-            logger.error(f"Navigation failed: {e}")
+            logger.error("Navigation failed: %s", e)
             return False
     
+    async def _receive_reply(
+        self,
+        ws,
+        msg_id: int,
+        timeout: float,
+        in_flight: Optional[set] = None
+    ) -> dict:
+        """
+        Read messages until the reply to msg_id arrives, skipping events and other replies.
+        
+        If in_flight is given, Network request events seen on the way are
+        recorded in it rather than dropped.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            
+            response = await ws.receive(timeout=remaining)
+            data = orjson.loads(response.data)
+            if data.get("id") == msg_id:
+                return data
+            if in_flight is not None:
+                _track_request(in_flight, data)
+    
+    async def _wait_for_network_idle_internal(
+        self,
+        ws,
+        idle_connections: int = 2,
+        idle_duration_ms: int = 500,
+        timeout_ms: int = 10000,
+        in_flight: Optional[set] = None
+    ) -> bool:
+        """
+        Wait for network idle by tracking in-flight requests from Network events.
+        
+        The page is idle once at most idle_connections requests have been in
+        flight for idle_duration_ms. The timer restarts whenever the count
+        climbs back over the threshold, so a burst that briefly drains and
+        then bounces back up doesn't count as idle.
+        
+        Requires Network.enable on this connection (navigate sends it).
+        Pass in_flight to continue from requests already seen on it.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout_ms / 1000
+        idle_window = idle_duration_ms / 1000
+        if in_flight is None:
+            in_flight = set()
+        idle_since = loop.time()
+        
+        while True:
+            now = loop.time()
+            idle = len(in_flight) <= idle_connections
+            if idle and now - idle_since >= idle_window:
+                return True
+            if now >= deadline:
+                return False
+            
+            # Sleep until the idle window would complete, or until the deadline
+            wait = min(idle_since + idle_window, deadline) if idle else deadline
+            try:
+                response = await ws.receive(timeout=wait - now)
+            except asyncio.TimeoutError:
+                continue
+            if response.type != aiohttp.WSMsgType.TEXT:
+                return False
+            
+            if not _track_request(in_flight, orjson.loads(response.data)):
+                continue
+            
+            # Idle timer starts when the count drops to the threshold
+            if not idle and len(in_flight) <= idle_connections:
+                idle_since = loop.time()
+    
     async def _wait_for_selector_internal(self, ws, selector: str, timeout_ms: int = 10000) -> bool:
         """Internal wait for selector using existing WebSocket connection."""
-        script = f'''
-        new Promise((resolve) => {{
-            const timeout = setTimeout(() => resolve(false), {timeout_ms});
-            const check = () => {{
-                const el = document.querySelector('{selector}');
-                if (el) {{
-                    clearTimeout(timeout);
-                    resolve(true);
-                }} else {{
-                    requestAnimationFrame(check);
-                }}
-            }};
-            check();
-        }})
-        '''
+        script = _wait_for_selector_script(selector, timeout_ms)
         
-        await ws.send_json({
+        await _send(ws, {
             "id": self._next_id(),
             "method": "Runtime.evaluate",
             "params": {"expression": script, "returnByValue": True, "awaitPromise": True}
         })
         
         try:
-            response = await asyncio.wait_for(ws.receive(), timeout=timeout_ms/1000 + 2)
+            response = await ws.receive(timeout=timeout_ms/1000 + 2)
             return True
         except:
             return False
@@ -176,21 +489,7 @@ class ChromeMCPClient:
         Returns:
             True if element found, False if timeout
         """
-        script = f'''
-        new Promise((resolve) => {{
-            const timeout = setTimeout(() => resolve(false), {timeout_ms});
-            const check = () => {{
-                const el = document.querySelector('{selector}');
-                if (el) {{
-                    clearTimeout(timeout);
-                    resolve(true);
-                }} else {{
-                    requestAnimationFrame(check);
-                }}
-            }};
-            check();
-        }})
-        '''
+        script = _wait_for_selector_script(selector, timeout_ms)
         try:
             result = await self.execute_script(script)
             return result is True
@@ -205,31 +504,7 @@ class ChromeMCPClient:
             idle_time_ms: How long network must be idle
             timeout_ms: Maximum wait time
         """
-        script = f'''
-        new Promise((resolve) => {{
-            let lastActivity = Date.now();
-            let resolved = false;
-            
-            const observer = new PerformanceObserver((list) => {{
-                lastActivity = Date.now();
-            }});
-            try {{ observer.observe({{ entryTypes: ['resource'] }}); }} catch(e) {{}}
-            
-            const check = setInterval(() => {{
-                if (Date.now() - lastActivity > {idle_time_ms}) {{
-                    clearInterval(check);
-                    try {{ observer.disconnect(); }} catch(e) {{}}
-                    if (!resolved) {{ resolved = true; resolve(true); }}
-                }}
-            }}, 100);
-            
-            setTimeout(() => {{
-                clearInterval(check);
-                try {{ observer.disconnect(); }} catch(e) {{}}
-                if (!resolved) {{ resolved = true; resolve(false); }}
-            }}, {timeout_ms});
-        }})
-        '''
+        script = _network_idle_script(idle_time_ms, timeout_ms)
         try:
             return await self.execute_script(script)
         except:
@@ -247,56 +522,81 @@ class ChromeMCPClient:
             Result from script execution
         """
         try:
-            async with aiohttp.ClientSession() as session:
-                ws_url = await self._get_ws_url(session)
-                if not ws_url:
-                    return None
+            session = _get_session()
+            ws = await self._connect(session, timeout=30)
+            if ws is None:
+                return None
+            
+            async with ws:
+                # Enable Runtime - its reply is skipped by the result loop below
+                await _send(ws, {"id": self._next_id(), "method": "Runtime.enable"})
                 
-                async with session.ws_connect(ws_url, timeout=30) as ws:
-                    # Enable Runtime
-                    await ws.send_json({"id": self._next_id(), "method": "Runtime.enable"})
-                    await asyncio.wait_for(ws.receive(), timeout=5)
-                    
-                    # Execute script
-                    exec_id = self._next_id()
-                    await ws.send_json({
-                        "id": exec_id,
-                        "method": "Runtime.evaluate",
-                        "params": {
-                            "expression": script,
-                            "returnByValue": True,
-                            "awaitPromise": True  # Support async scripts
-                        }
-                    })
-                    
-                    # Wait for result - skip event messages
-                    for _ in range(20):
-                        try:
-                            response = await asyncio.wait_for(ws.receive(), timeout=10)
-                            data = json.loads(response.data)
-                            
-                            # Skip method/event messages
-                            if "method" in data:
-                                continue
-                            
-                            # Check if this is our result
-                            if data.get("id") == exec_id:
-                                if "error" in data:
-                                    logger.error(f"Script error: {data['error']}")
-                                    return None
-                                
-                                if "result" in data and "result" in data["result"]:
-                                    return data["result"]["result"].get("value")
+                # Execute script
+                exec_id = self._next_id()
+                await _send(ws, {
+                    "id": exec_id,
+                    "method": "Runtime.evaluate",
+                    "params": {
+                        "expression": script,
+                        "returnByValue": True,
+                        "awaitPromise": True  # Support async scripts
+                    }
+                })
+                
+                # Wait for result - skip event messages
+                for _ in range(20):
+                    try:
+                        response = await ws.receive(timeout=10)
+                        data = orjson.loads(response.data)
+                        
+                        # Skip method/event messages
+                        if "method" in data:
+                            continue
+                        
+                        # Check if this is our result
+                        if data.get("id") == exec_id:
+                            if "error" in data:
+                                logger.error("Script error: %s", data['error'])
                                 return None
-                        except asyncio.TimeoutError:
-                            break
-                    
-                    return None
-                    
+                            
+                            if "result" in data and "result" in data["result"]:
+                                return data["result"]["result"].get("value")
+                            return None
+                    except asyncio.TimeoutError:
+                        break
+                
+                return None
+                
+        except aiohttp.ClientError as e:
+            self._forget_target()
+            logger.error("Script execution failed: %s", e)
+            return None
         except Exception as e:
-            logger.error(f"Script execution failed: {e}")
+            logger.error("Script execution failed: %s", e)
             return None
     
+    async def execute_scripts(self, scripts: List[str]) -> List[Any]:
+        """
+        Execute several JavaScript expressions in one round-trip.
+        
+        Expressions run in order and promises are awaited before the next
+        one starts, so a scroll, a wait and a count behave exactly like three
+        execute_script calls - without three connections.
+        
+        Args:
+            scripts: JavaScript expressions to evaluate
+            
+        Returns:
+            Results in the same order (all None if execution failed)
+        """
+        steps = "".join(f"results.push(await ({script}));\n" for script in scripts)
+        batch = f"(async () => {{\nconst results = [];\n{steps}return results;\n}})()"
+        
+        results = await self.execute_script(batch)
+        if not isinstance(results, list) or len(results) != len(scripts):
+            return [None] * len(scripts)
+        return results
+    
     async def click(self, selector: str) -> bool:
         """Click an element by CSS selector."""
         script = f"""
@@ -335,22 +635,22 @@ class ChromeMCPClient:
         """
         try:
             for i in range(iterations):
-                # Scroll to bottom
-                await self.execute_script("window.scrollTo(0, document.body.scrollHeight)")
-                
-                # Smart wait - check for network idle or use short delay
-                idle = await self.wait_for_network_idle(idle_time_ms=300, timeout_ms=1500)
+                # Scroll to bottom and wait for network idle in one round-trip
+                _, idle = await self.execute_scripts([
+                    _SCROLL_TO_BOTTOM_SCRIPT,
+                    _network_idle_script(idle_time_ms=300, timeout_ms=1500)
+                ])
                 
                 if not idle:
                     # Fallback to short random delay
                     delay = delay_ms + random.randint(-200, 200)
                     await asyncio.sleep(delay / 1000)
                 
-                logger.debug(f"Scroll iteration {i+1}/{iterations}")
+                logger.debug("Scroll iteration %d/%d", i + 1, iterations)
             
             return True
         except Exception as e:
-            logger.error(f"Scroll failed: {e}")
+            logger.error("Scroll failed: %s", e)
             return False
     
     async def scroll_until_target(
@@ -368,11 +668,18 @@ class ChromeMCPClient:
         prev_count = 0
         no_change_count = 0
         
+        count_script = _count_script(selector)
+        # Scroll, let the next batch load and recount - one round-trip per iteration
+        scroll_scripts = [
+            _SCROLL_TO_BOTTOM_SCRIPT,
+            _network_idle_script(idle_time_ms=300, timeout_ms=1000),
+            "new Promise((resolve) => setTimeout(resolve, 300))",
+            count_script
+        ]
+        
+        current_count = await self.execute_script(count_script) or 0
+        
         for iteration in range(max_iterations):
-            # Get current count
-            count_script = f"document.querySelectorAll('{selector}').length"
-            current_count = await self.execute_script(count_script) or 0
-            
             # Check if target reached
             if current_count >= target_count:
                 return {
@@ -395,43 +702,37 @@ class ChromeMCPClient:
             
             prev_count = current_count
             
-            # Scroll
-            await self.execute_script("window.scrollTo(0, document.body.scrollHeight)")
-            
-            # Short wait
-            await self.wait_for_network_idle(idle_time_ms=300, timeout_ms=1000)
-            await asyncio.sleep(0.3)
+            # Scroll, wait and get the new count
+            current_count = (await self.execute_scripts(scroll_scripts))[-1] or 0
         
-        final_count = await self.execute_script(f"document.querySelectorAll('{selector}').length") or 0
         return {
             'iterations': max_iterations,
-            'final_count': final_count,
+            'final_count': current_count,
             'stopped_reason': 'max_iterations'
         }
 
     
     async def get_page_html(self) -> str:
         """Get the current page HTML."""
-        return await self.execute_script("document.documentElement.outerHTML") or ""
+        return await self.execute_script(_PAGE_HTML_SCRIPT) or ""
     
     async def check_health(self) -> dict:
         """Check if Chrome is responsive."""
-        import time
         try:
             start = time.time()
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.endpoint}/json/version",
-                    timeout=aiohttp.ClientTimeout(total=2)
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        return {
-                            'healthy': True,
-                            'response_time_ms': round((time.time() - start) * 1000),
-                            'browser_version': data.get('Browser'),
-                            'protocol_version': data.get('Protocol-Version')
-                        }
+            session = _get_session()
+            async with session.get(
+                f"{self.endpoint}/json/version",
+                timeout=aiohttp.ClientTimeout(total=2)
+            ) as resp:
+                if resp.status == 200:
+                    data = await resp.json()
+                    return {
+                        'healthy': True,
+                        'response_time_ms': round((time.time() - start) * 1000),
+                        'browser_version': data.get('Browser'),
+                        'protocol_version': data.get('Protocol-Version')
+                    }
         except Exception as e:
             return {'healthy': False, 'error': str(e)}
         return {'healthy': False, 'error': 'Unknown error'}
@@ -439,53 +740,52 @@ class ChromeMCPClient:
     async def save_cookies(self, path: str) -> bool:
         """Save current session cookies to file."""
         try:
-            async with aiohttp.ClientSession() as session:
-                ws_url = await self._get_ws_url(session)
-                if not ws_url:
-                    return False
+            session = _get_session()
+            ws = await self._connect(session)
+            if ws is None:
+                return False
+            
+            async with ws:
+                await _send(ws, {
+                    "id": self._next_id(),
+                    "method": "Network.getAllCookies"
+                })
                 
-                async with session.ws_connect(ws_url) as ws:
-                    await ws.send_json({
-                        "id": self._next_id(),
-                        "method": "Network.getAllCookies"
-                    })
-                    
-                    response = await ws.receive()
-                    result = json.loads(response.data)
-                    
-                    if "result" in result and "cookies" in result["result"]:
-                        cookies = result["result"]["cookies"]
-                        with open(path, 'w') as f:
-                            json.dump(cookies, f)
-                        logger.info(f"Saved {len(cookies)} cookies to {path}")
-                        return True
+                response = await ws.receive()
+                result = orjson.loads(response.data)
+                
+                if "result" in result and "cookies" in result["result"]:
+                    cookies = result["result"]["cookies"]
+                    # File I/O off the event loop
+                    await asyncio.to_thread(_write_json, path, cookies)
+                    logger.info("Saved %d cookies to %s", len(cookies), path)
+                    return True
             return False
         except Exception as e:
-            logger.error(f"Failed to save cookies: {e}")
+            logger.error("Failed to save cookies: %s", e)
             return False
     
     async def load_cookies(self, path: str) -> bool:
         """Load session cookies from file."""
         try:
-            with open(path, 'r') as f:
-                cookies = json.load(f)
+            cookies = await asyncio.to_thread(_read_json, path)
             
-            async with aiohttp.ClientSession() as session:
-                ws_url = await self._get_ws_url(session)
-                if not ws_url:
-                    return False
+            session = _get_session()
+            ws = await self._connect(session)
+            if ws is None:
+                return False
+            
+            async with ws:
+                for cookie in cookies:
+                    await _send(ws, {
+                        "id": self._next_id(),
+                        "method": "Network.setCookie",
+                        "params": cookie
+                    })
+                    await ws.receive()
                 
-                async with session.ws_connect(ws_url) as ws:
-                    for cookie in cookies:
-                        await ws.send_json({
-                            "id": self._next_id(),
-                            "method": "Network.setCookie",
-                            "params": cookie
-                        })
-                        await ws.receive()
-                    
-                    logger.info(f"Loaded {len(cookies)} cookies from {path}")
-                    return True
+                logger.info("Loaded %d cookies from %s", len(cookies), path)
+                return True
         except Exception as e:
-            logger.error(f"Failed to load cookies: {e}")
+            logger.error("Failed to load cookies: %s", e)
             return False
@@ -13,8 +13,9 @@ import asyncio
 import logging
 import os
 import random
-from typing import List, Optional, Callable
-from datetime import datetime, timedelta
+import time
+from collections import deque
+from typing import Deque, List, Optional, Callable
 
 from src.models import Listing
 from .mcp_client import ChromeMCPClient
@@ -23,6 +24,13 @@ from .scraper_fixed import SINGLE_LISTING_EXTRACTION_SCRIPT
 
 logger = logging.getLogger(__name__)
 
+# Scraper settings - parsed once at import, not per search
+CHROME_DEBUG_PORT = os.getenv("CHROME_DEBUG_PORT", "9222")
+MAX_PAGES_PER_HOUR = int(os.getenv("MAX_PAGES_PER_HOUR", "30"))
+MIN_DELAY_SECONDS = float(os.getenv("MIN_DELAY_SECONDS", "1"))
+MAX_DELAY_SECONDS = float(os.getenv("MAX_DELAY_SECONDS", "3"))
+MAX_CONCURRENT_PAGES = int(os.getenv("MAX_CONCURRENT_PAGES", "3"))
+
 
 class MarketplaceScraper:
     """
@@ -31,18 +39,20 @@ class MarketplaceScraper:
     """
     
     def __init__(self):
-        chrome_port = os.getenv("CHROME_DEBUG_PORT", "9222")
-        self.mcp_client = ChromeMCPClient(f"http://localhost:{chrome_port}")
+        self.mcp_client = ChromeMCPClient(f"http://localhost:{CHROME_DEBUG_PORT}")
         self.extractor = ListingExtractor()
         
         # Rate limiting
-        self.max_pages_per_hour = int(os.getenv("MAX_PAGES_PER_HOUR", "30"))
-        self.min_delay = float(os.getenv("MIN_DELAY_SECONDS", "1"))
-        self.max_delay = float(os.getenv("MAX_DELAY_SECONDS", "3"))
-        self.request_times: List[datetime] = []
+        self.max_pages_per_hour = MAX_PAGES_PER_HOUR
+        self.min_delay = MIN_DELAY_SECONDS
+        self.max_delay = MAX_DELAY_SECONDS
+        # Monotonic timestamps of requests in the last hour, oldest first
+        self.request_times: Deque[float] = deque()
+        # Monotonic time before which the next search should not navigate
+        self._next_action_at = 0.0
         
         # Parallel processing
-        self.max_concurrent_pages = int(os.getenv("MAX_CONCURRENT_PAGES", "3"))
+        self.max_concurrent_pages = MAX_CONCURRENT_PAGES
         self._semaphore = asyncio.Semaphore(self.max_concurrent_pages)
     
     async def scrape_single_listing(self, url: str) -> Optional[dict]:
@@ -56,27 +66,25 @@ class MarketplaceScraper:
             Dict with listing details or None
         """
         try:
-            # Navigate with DOM-ready wait (faster than full load)
-            success = await self.mcp_client.navigate(url, wait_for="domcontentloaded")
+            # Navigate and wait for the page to settle (networkidle2) on the
+            # same connection - no separate idle-check round-trip
+            success = await self.mcp_client.navigate(url, wait_for="networkidle2")
             if not success:
-                logger.error(f"Failed to navigate to {url}")
+                logger.error("Failed to navigate to %s", url)
                 return None
             
-            # Wait for content to render
-            await self.mcp_client.wait_for_network_idle(idle_time_ms=500, timeout_ms=3000)
-            
             # Extract listing details
             result = await self.mcp_client.execute_script(SINGLE_LISTING_EXTRACTION_SCRIPT)
             
             if result:
-                logger.info(f"Scraped listing: {result.get('title', 'Unknown')[:50]}")
+                logger.info("Scraped listing: %.50s", result.get('title', 'Unknown'))
                 return result
             else:
                 logger.warning("Failed to extract listing details")
                 return None
                 
         except Exception as e:
-            logger.error(f"Failed to scrape single listing: {e}")
+            logger.error("Failed to scrape single listing: %s", e)
             return None
     
     async def search_listings(self, url: str) -> List[Listing]:
@@ -94,11 +102,14 @@ class MarketplaceScraper:
             logger.warning("Rate limit exceeded, skipping request")
             return []
         
+        # Sit out whatever is left of the delay the previous search scheduled
+        await self._wait_for_turn()
+        
         try:
             # Navigate with DOM-ready wait
             success = await self.mcp_client.navigate(url, wait_for="domcontentloaded")
             if not success:
-                logger.error(f"Failed to navigate to {url}")
+                logger.error("Failed to navigate to %s", url)
                 return []
             
             # Wait for marketplace items to appear
@@ -115,9 +126,10 @@ class MarketplaceScraper:
             )
             
             logger.info(
-                f"Scroll complete: {scroll_result['final_count']} items "
-                f"in {scroll_result['iterations']} iterations "
-                f"({scroll_result['stopped_reason']})"
+                "Scroll complete: %d items in %d iterations (%s)",
+                scroll_result['final_count'],
+                scroll_result['iterations'],
+                scroll_result['stopped_reason']
             )
             
             # Extract listings
@@ -130,19 +142,20 @@ class MarketplaceScraper:
                 return []
             
             listings = self.extractor.extract_from_script_result(script_result)
-            logger.info(f"Extracted {len(listings)} listings")
+            logger.info("Extracted %d listings", len(listings))
             
             # Record request time
             self._record_request()
             
-            # Short delay before next action
-            delay = random.uniform(self.min_delay, self.max_delay)
-            await asyncio.sleep(delay)
+            # Short delay before next action - scheduled rather than slept here,
+            # so the caller can process these listings while it elapses and the
+            # last search of a batch doesn't pay for it at all
+            self._next_action_at = time.monotonic() + random.uniform(self.min_delay, self.max_delay)
             
             return listings
             
         except Exception as e:
-            logger.error(f"Scraping failed: {e}")
+            logger.error("Scraping failed: %s", e)
             return []
 
     
@@ -176,7 +189,7 @@ class MarketplaceScraper:
                     result = await self.scrape_single_listing(url)
                     results[index] = result
                 except Exception as e:
-                    logger.error(f"Failed to scrape {url}: {e}")
+                    logger.error("Failed to scrape %s: %s", url, e)
                     results[index] = None
                 finally:
                     completed += 1
@@ -193,7 +206,7 @@ class MarketplaceScraper:
         await asyncio.gather(*tasks, return_exceptions=True)
         
         successful = sum(1 for r in results if r is not None)
-        logger.info(f"Parallel scrape complete: {successful}/{total} successful")
+        logger.info("Parallel scrape complete: %d/%d successful", successful, total)
         
         return results
     
@@ -212,8 +225,6 @@ class MarketplaceScraper:
                 'timing': {'search_ms': int, 'details_ms': int, 'total_ms': int}
             }
         """
-        import time
-        
         # Phase 1: Search and extract listing cards
         search_start = time.time()
         listings = await self.search_listings(search_url)
@@ -239,16 +250,22 @@ class MarketplaceScraper:
             }
         }
     
+    async def _wait_for_turn(self):
+        """Sleep until the delay scheduled by the previous search has passed."""
+        remaining = self._next_action_at - time.monotonic()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+    
     def _check_rate_limit(self) -> bool:
         """Check if we're within rate limits."""
-        now = datetime.now()
-        one_hour_ago = now - timedelta(hours=1)
-        self.request_times = [t for t in self.request_times if t > one_hour_ago]
+        cutoff = time.monotonic() - 3600
+        while self.request_times and self.request_times[0] <= cutoff:
+            self.request_times.popleft()
         return len(self.request_times) < self.max_pages_per_hour
     
     def _record_request(self):
         """Record a request for rate limiting."""
-        self.request_times.append(datetime.now())
+        self.request_times.append(time.monotonic())
     
     async def check_browser_health(self) -> dict:
         """Check if Chrome browser is healthy and responsive."""
@@ -1,7 +1,7 @@
 """eBay API integration services"""
 
-from .ebay_client import EbayBrowseClient, EbayItem
+from .ebay_client import EbayAPIError, EbayBrowseClient, EbayItem
 from .deal_analyzer import DealAnalyzer
 from .query_optimizer import EbayQueryOptimizer, optimize_for_ebay
 
-__all__ = ["EbayBrowseClient", "EbayItem", "DealAnalyzer", "EbayQueryOptimizer", "optimize_for_ebay"]
+__all__ = ["EbayAPIError", "EbayBrowseClient", "EbayItem", "DealAnalyzer", "EbayQueryOptimizer", "optimize_for_ebay"]
@@ -3,13 +3,18 @@ AI-powered deal analysis using eBay price data and Claude.
 Combines market data with intelligent reasoning for deal scoring.
 """
 
+import bisect
+import logging
 import os
 from typing import Dict, List, Optional
 import anthropic
+import orjson
 from .ebay_client import EbayBrowseClient, EbayItem
 from .query_optimizer import EbayQueryOptimizer
 from ...models.deal import Deal, DealRating
 
+logger = logging.getLogger(__name__)
+
 
 class DealAnalyzer:
     """
@@ -32,6 +37,10 @@ class DealAnalyzer:
         }
     }
     
+    # Sample-size thresholds -> confidence level (bisect lookup)
+    CONFIDENCE_THRESHOLDS = (10, 20)
+    CONFIDENCE_LEVELS = ("LOW", "MEDIUM", "HIGH")
+    
     def __init__(self):
         self.ebay_client = EbayBrowseClient()
         self.query_optimizer = EbayQueryOptimizer()
@@ -65,8 +74,6 @@ class DealAnalyzer:
         secondary_queries = optimized.get("secondary_queries", [])
         
         # TRACE: Log query optimization
-        import logging
-        logger = logging.getLogger(__name__)
         logger.info(f"=== DEAL ANALYSIS ===")
         logger.info(f"Original title: {listing_title}")
         logger.info(f"Description preview: {listing_description[:100] if listing_description else 'None'}...")
@@ -293,12 +300,7 @@ class DealAnalyzer:
     
     def _calculate_confidence(self, sample_size: int) -> str:
         """Calculate confidence level based on sample size"""
-        if sample_size >= 20:
-            return "HIGH"
-        elif sample_size >= 10:
-            return "MEDIUM"
-        else:
-            return "LOW"
+        return self.CONFIDENCE_LEVELS[bisect.bisect_right(self.CONFIDENCE_THRESHOLDS, sample_size)]
     
     def _generate_basic_reason(
         self,
@@ -375,8 +377,7 @@ Respond in JSON format:
                 messages=[{"role": "user", "content": prompt}]
             )
             
-            import json
-            result = json.loads(response.content[0].text)
+            result = orjson.loads(response.content[0].text)
             return result
         except Exception as e:
             print(f"AI analysis failed: {e}")
@@ -3,18 +3,58 @@ eBay Browse API Client - Integrates with eBay's Browse API for price comparison
 and deal validation. Uses OAuth2 client credentials flow.
 """
 
+import hashlib
+import logging
 import os
+import random
+import time
 import aiohttp
+import orjson
 import asyncio
+from collections import OrderedDict
 from typing import Optional, Dict, List, Any
-from datetime import datetime, timedelta
-import json
 from dataclasses import dataclass
 
+from src.db import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+# Title fragments that mark a result as an accessory for the product
+# ("for Sony A7 II", "compatible with...") rather than the product itself
+_ACCESSORY_INDICATORS = (
+    ' for ', ' fits ', ' compatible ', ' replacement ', ' cover ', ' case ',
+    ' strap ', ' battery ', ' charger ', ' grip ', ' mount ', ' adapter ',
+    ' cable ', ' cord ', ' screen protector ', ' filter ', ' hood ', ' cap ',
+    ' remote ', ' trigger ', ' plate ', ' bracket ', ' bag ', ' pouch ',
+    ' book ', ' guide ', ' manual ', ' dummy '
+)
+
+
+class EbayAPIError(Exception):
+    """Non-200 response from the eBay API"""
+    
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+    
+    @property
+    def retryable(self) -> bool:
+        """Rate limits and server errors are worth retrying; anything else won't change"""
+        return self.status == 429 or self.status >= 500
+
 
 @dataclass
 class EbayItem:
     """Simplified eBay item representation"""
+    # Up to 200 of these per search - slots drop the per-instance __dict__
+    # (dataclass(slots=True) needs 3.10; fields have no defaults so this works)
+    __slots__ = (
+        "item_id", "title", "price", "currency", "condition", "image_url",
+        "item_url", "seller_username", "seller_feedback_score",
+        "shipping_cost", "location"
+    )
+    
     item_id: str
     title: str
     price: float
@@ -44,6 +84,21 @@ class EbayBrowseClient:
     PROD_BASE_URL = "https://api.ebay.com/buy/browse/v1"
     PROD_AUTH_URL = "https://api.ebay.com/identity/v1/oauth2/token"
     
+    # In-memory search cache: LRU shared by all clients in the process,
+    # since a new client is built for every DealAnalyzer
+    SEARCH_CACHE_SIZE = 1024
+    SEARCH_CACHE_TTL = 3600  # 1 hour
+    _search_cache: "OrderedDict[str, tuple[float, List[EbayItem]]]" = OrderedDict()
+    
+    # Transient Browse API failures (429, 5xx, timeouts) are retried with
+    # capped decorrelated-jitter backoff; each try gets its own timeout, cut
+    # short so the whole call stays within RETRY_BUDGET
+    MAX_RETRIES = 3
+    RETRY_BASE_DELAY = 0.5
+    RETRY_MAX_DELAY = float(os.getenv("EBAY_RETRY_MAX_DELAY", "8"))
+    REQUEST_TIMEOUT = 10  # seconds per attempt
+    RETRY_BUDGET = float(os.getenv("EBAY_RETRY_BUDGET", "30"))  # seconds across all attempts
+    
     def __init__(self):
         self.client_id = os.getenv("EBAY_CLIENT_ID")
         self.client_secret = os.getenv("EBAY_CLIENT_SECRET")
@@ -57,12 +112,9 @@ class EbayBrowseClient:
         self.AUTH_URL = self.SANDBOX_AUTH_URL if self.is_sandbox else self.PROD_AUTH_URL
         
         self.access_token: Optional[str] = None
-        self.token_expires_at: Optional[datetime] = None
+        self.token_expires_at: Optional[float] = None
         self._session: Optional[aiohttp.ClientSession] = None
         
-        # In-memory cache for search results (1 hour TTL)
-        self._search_cache: Dict[str, tuple[datetime, List[EbayItem]]] = {}
-        
         # Redis cache TTL (1 hour for eBay data)
         self.REDIS_CACHE_TTL = 3600
         
@@ -90,7 +142,7 @@ class EbayBrowseClient:
     async def _ensure_token(self):
         """Ensure we have a valid OAuth token"""
         if self.access_token and self.token_expires_at:
-            if datetime.now() < self.token_expires_at:
+            if time.monotonic() < self.token_expires_at:
                 return
         
         # Ensure session exists
@@ -110,13 +162,15 @@ class EbayBrowseClient:
             headers={"Content-Type": "application/x-www-form-urlencoded"}
         ) as response:
             if response.status != 200:
-                raise Exception(f"Failed to get eBay token: {await response.text()}")
+                raise EbayAPIError(
+                    response.status, f"Failed to get eBay token: {await response.text()}"
+                )
             
             result = await response.json()
             self.access_token = result["access_token"]
             # Set expiry 5 minutes before actual expiry for safety
             expires_in = result.get("expires_in", 7200) - 300
-            self.token_expires_at = datetime.now() + timedelta(seconds=expires_in)
+            self.token_expires_at = time.monotonic() + expires_in
     
     async def search_items(
         self,
@@ -147,10 +201,9 @@ class EbayBrowseClient:
         """
         # Check cache first
         cache_key = f"{query}:{category_ids}:{condition}:{price_min}:{price_max}:{sort}"
-        if cache_key in self._search_cache:
-            cached_time, cached_results = self._search_cache[cache_key]
-            if datetime.now() - cached_time < timedelta(hours=1):
-                return cached_results[:limit]
+        cached = self._search_cache_get(cache_key)
+        if cached is not None:
+            return cached[:limit]
         
         await self._ensure_token()
         
@@ -189,12 +242,7 @@ class EbayBrowseClient:
         
         url = f"{self.BASE_URL}/item_summary/search"
         
-        async with self._session.get(url, params=params, headers=headers) as response:
-            if response.status != 200:
-                error_text = await response.text()
-                raise Exception(f"eBay API error: {response.status} - {error_text}")
-            
-            data = await response.json()
+        data = await self._get_json(url, params, headers)
         
         # Parse results
         items = []
@@ -206,10 +254,67 @@ class EbayBrowseClient:
                 continue
         
         # Cache results
-        self._search_cache[cache_key] = (datetime.now(), items)
+        self._search_cache_put(cache_key, items)
         
         return items
     
+    async def _get_json(self, url: str, params: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+        """GET a Browse API endpoint, retrying rate limits and server errors"""
+        # One wall-clock budget for the whole call, so retries can't stack
+        # four full request timeouts plus backoff onto a single analysis
+        deadline = time.monotonic() + self.RETRY_BUDGET
+        delay = self.RETRY_BASE_DELAY
+        for attempt in range(self.MAX_RETRIES + 1):
+            remaining = deadline - time.monotonic()
+            last_attempt = attempt == self.MAX_RETRIES or remaining <= self.RETRY_BASE_DELAY
+            try:
+                async with self._session.get(
+                    url, params=params, headers=headers,
+                    timeout=aiohttp.ClientTimeout(
+                        total=max(self.RETRY_BASE_DELAY, min(self.REQUEST_TIMEOUT, remaining))
+                    )
+                ) as response:
+                    if response.status == 200:
+                        return await response.json()
+                    
+                    error_text = await response.text()
+                    error = EbayAPIError(
+                        response.status, f"eBay API error: {response.status} - {error_text}"
+                    )
+                    if not error.retryable or last_attempt:
+                        raise error
+            except (asyncio.TimeoutError, aiohttp.ClientConnectionError):
+                if last_attempt:
+                    raise
+            
+            # Decorrelated jitter: each sleep is drawn from [base, 3x previous],
+            # so concurrent analyses hitting the same 429 don't retry in lockstep
+            delay = min(self.RETRY_MAX_DELAY, random.uniform(self.RETRY_BASE_DELAY, delay * 3))
+            await asyncio.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+    
+    def _search_cache_get(self, key: str) -> Optional[List[EbayItem]]:
+        """Look up fresh search results in the in-process LRU"""
+        cache = EbayBrowseClient._search_cache
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        
+        cached_at, items = entry
+        if time.monotonic() - cached_at >= self.SEARCH_CACHE_TTL:
+            del cache[key]
+            return None
+        
+        cache.move_to_end(key)
+        return items
+    
+    def _search_cache_put(self, key: str, items: List[EbayItem]):
+        """Store search results in the in-process LRU, evicting the oldest"""
+        cache = EbayBrowseClient._search_cache
+        cache[key] = (time.monotonic(), items)
+        cache.move_to_end(key)
+        if len(cache) > self.SEARCH_CACHE_SIZE:
+            cache.popitem(last=False)
+    
     def _parse_item(self, data: Dict[str, Any]) -> EbayItem:
         """Parse eBay API item data into EbayItem"""
         price_data = data.get("price", {})
@@ -250,19 +355,14 @@ class EbayBrowseClient:
         Returns:
             Dict with avg_price, median_price, min_price, max_price, sample_size, items
         """
-        import logging
-        import hashlib
-        logger = logging.getLogger(__name__)
-        
         # Check Redis cache first
         cache_key = f"ebay_stats:{hashlib.md5(f'{query}:{condition}:{reference_price}'.encode()).hexdigest()}"
         try:
-            from src.db import get_redis
             redis_client = get_redis()
             cached = await redis_client.get(cache_key)
             if cached:
                 logger.info(f"[EBAY CACHE HIT] Query: '{query}'")
-                cached_data = json.loads(cached)
+                cached_data = orjson.loads(cached)
                 # Reconstruct EbayItem objects
                 cached_data["items"] = [
                     EbayItem(**item) for item in cached_data.get("items_data", [])
@@ -316,19 +416,11 @@ class EbayBrowseClient:
             
             # Step 2: Title relevance filtering - ensure results are the MAIN product, not accessories
             # Accessories often mention the main product ("for Sony A7 II", "compatible with...")
-            accessory_indicators = [
-                ' for ', ' fits ', ' compatible ', ' replacement ', ' cover ', ' case ',
-                ' strap ', ' battery ', ' charger ', ' grip ', ' mount ', ' adapter ',
-                ' cable ', ' cord ', ' screen protector ', ' filter ', ' hood ', ' cap ',
-                ' remote ', ' trigger ', ' plate ', ' bracket ', ' bag ', ' pouch ',
-                ' book ', ' guide ', ' manual ', ' dummy '
-            ]
-            
             main_product_items = []
             for item in items:
                 title_lower = item.title.lower()
                 # Check if this looks like an accessory (mentions "for [product]" pattern)
-                is_accessory = any(indicator in title_lower for indicator in accessory_indicators)
+                is_accessory = any(indicator in title_lower for indicator in _ACCESSORY_INDICATORS)
                 
                 if not is_accessory:
                     main_product_items.append(item)
@@ -392,7 +484,6 @@ class EbayBrowseClient:
         
         # Cache result in Redis for 1 hour
         try:
-            from src.db import get_redis
             redis_client = get_redis()
             # Store items as dicts for JSON serialization
             cache_data = {
@@ -415,7 +506,7 @@ class EbayBrowseClient:
                 ]
             }
             del cache_data["items"]  # Remove non-serializable items list
-            await redis_client.setex(cache_key, self.REDIS_CACHE_TTL, json.dumps(cache_data))
+            await redis_client.setex(cache_key, self.REDIS_CACHE_TTL, orjson.dumps(cache_data))
             logger.info(f"[EBAY CACHE] Cached stats for '{query}' (1 hour TTL)")
         except Exception as e:
             logger.warning(f"Failed to cache eBay stats: {e}")
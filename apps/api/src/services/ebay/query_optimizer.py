@@ -7,6 +7,110 @@ import re
 import os
 from typing import List, Dict, Optional
 import anthropic
+import orjson
+
+
+# Category keywords in priority order - the first category with any hit wins
+_CATEGORY_KEYWORDS = (
+    ("Cameras & Photo", ('sony a7', 'canon eos', 'nikon', 'fuji', 'camera', 'lens')),
+    ("Cell Phones & Accessories", ('iphone', 'samsung', 'galaxy', 'pixel', 'phone')),
+    ("Computers/Tablets & Networking", ('macbook', 'laptop', 'dell', 'hp', 'lenovo', 'computer')),
+    ("Video Games & Consoles", ('ps5', 'playstation', 'xbox', 'nintendo', 'switch', 'gaming')),
+)
+
+# keyword -> priority (index into _CATEGORY_KEYWORDS)
+_KEYWORD_PRIORITY = {
+    kw: priority
+    for priority, (_, keywords) in enumerate(_CATEGORY_KEYWORDS)
+    for kw in keywords
+}
+
+# Zero-width lookahead so overlapping keywords are all seen in one pass
+_CATEGORY_RE = re.compile(
+    "(?=(" + "|".join(re.escape(kw) for kw in _KEYWORD_PRIORITY) + "))"
+)
+
+# Compiled once at import - these run on every listing title
+_EMOJI_RE = re.compile("["
+    u"\U0001F600-\U0001F64F"  # emoticons
+    u"\U0001F300-\U0001F5FF"  # symbols & pictographs
+    u"\U0001F680-\U0001F6FF"  # transport & map symbols
+    u"\U0001F1E0-\U0001F1FF"  # flags
+    u"\U00002702-\U000027B0"
+    u"\U000024C2-\U0001F251"
+    "]+", flags=re.UNICODE)
+
+# Keep alphanumeric, spaces, and hyphens
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s\-]')
+
+_DIGIT_RE = re.compile(r'\d')
+
+# Common model number formats (A7xii -> A7 II, A7riii -> A7R III)
+_MODEL_NUMBER_RE = re.compile(r'([Aa]7)([xXrRsS]?)([iIvV]+)')
+
+# Common accessory patterns - more specific for better eBay search
+_ACCESSORY_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(g-?master\s+lens(?:es)?)',  # Sony G-Master lenses
+    r'(gm\s+lens(?:es)?)',
+    r'(godox\s+\w+)',  # Godox flash/trigger
+    r'(sigma\s+\d+(?:-\d+)?(?:mm)?)',  # Sigma lenses
+    r'(tamron\s+\d+(?:-\d+)?(?:mm)?)',  # Tamron lenses
+    r'(\d+(?:-\d+)?mm\s+(?:f/?[\d.]+\s+)?lens)',  # Generic lens with focal length
+    r'(\w+\s+flash)',
+    r'(\w+\s+trigger)',
+    r'(\w+\s+controller(?:s)?)',
+    r'(\w+\s+battery\s+grip)',
+    r'(magic\s+mouse)',
+    r'(magic\s+keyboard)',
+    r'(airpods?\s*(?:pro)?)',
+))
+
+_EXTRACTION_SYSTEM_PROMPT = """You are an expert at extracting product information from Facebook Marketplace listings for eBay price comparison.
+
+Your task: Extract the PRIMARY product being sold. Use BOTH the title AND description to identify the exact product.
+
+IMPORTANT: The title may be vague (like "Great deal!" or "Must sell!") but the description usually contains the actual product details. READ THE DESCRIPTION CAREFULLY.
+
+RULES:
+1. PRIMARY PRODUCT: Extract the main item being sold (brand + model + key specs)
+   - Look in the description for brand names, model numbers, specifications
+   - Fix common typos and abbreviations
+   - Include important specs like storage size, color, generation
+   - Keep it concise but specific enough to find the exact product on eBay
+   
+2. ACCESSORIES: Additional items included that have independent resale value
+   - Only include items with brand names that can be searched separately
+   - Skip generic items like "cables", "box", "manual", "charger"
+
+3. CATEGORY: electronics, camera, phone, computer, gaming, audio, furniture, clothing, tools, sports, other
+
+Return JSON format:
+{"primary": "exact eBay search query", "accessories": ["item1", "item2"], "category": "category"}
+
+EXAMPLES:
+Title: "Great camera deal!" Description: "Selling my Sony A7 III with original box..." → {"primary": "Sony A7 III", "accessories": [], "category": "camera"}
+Title: "Moving sale" Description: "iPhone 14 Pro 256GB Space Black, excellent condition" → {"primary": "iPhone 14 Pro 256GB", "accessories": [], "category": "phone"}
+Title: "Sony A7xii (LENS NOT INCLUDED)" → {"primary": "Sony A7 II", "accessories": [], "category": "camera"}
+
+Return ONLY valid JSON, nothing else."""
+
+
+def _strip_code_fence(text: str) -> str:
+    """Unwrap a ```json ... ``` block if the model added one (linear str.find scan)"""
+    start = text.find("```")
+    if start == -1:
+        return text
+    
+    # Skip the fence and its language tag
+    start += 3
+    if text.startswith("json", start):
+        start += 4
+    end = text.find("```", start)
+    return text[start:end if end != -1 else len(text)].strip()
+
+
+def _format_model_number(match: re.Match) -> str:
+    return f"{match.group(1)}{match.group(2).upper()} {match.group(3).upper()}"
 
 
 class EbayQueryOptimizer:
@@ -21,14 +125,14 @@ class EbayQueryOptimizer:
     """
     
     # Common words to remove from queries
-    STOP_WORDS = {
+    STOP_WORDS = frozenset({
         'kit', 'bundle', 'set', 'lot', 'combo', 'package', 'deal',
         'with', 'and', 'plus', 'includes', 'included', 'comes',
         'great', 'excellent', 'good', 'perfect', 'mint', 'like new',
         'obo', 'firm', 'cash', 'only', 'pickup', 'local',
         'must', 'sell', 'need', 'gone', 'today', 'asap',
         'the', 'a', 'an', 'for', 'in', 'on', 'at', 'to'
-    }
+    })
     
     # Known brand patterns
     BRANDS = {
@@ -38,6 +142,8 @@ class EbayQueryOptimizer:
         'gaming': ['sony', 'playstation', 'ps5', 'ps4', 'microsoft', 'xbox', 'nintendo', 'switch'],
         'audio': ['sony', 'bose', 'apple', 'airpods', 'beats', 'sennheiser', 'audio-technica'],
     }
+    # Every brand word, for O(1) membership checks
+    BRAND_WORDS = frozenset(brand for brands in BRANDS.values() for brand in brands)
     
     def __init__(self):
         api_key = os.getenv("ANTHROPIC_API_KEY")
@@ -73,24 +179,16 @@ class EbayQueryOptimizer:
     def _clean_title(self, title: str) -> str:
         """Remove emojis, special chars, and normalize whitespace"""
         # Remove emojis
-        emoji_pattern = re.compile("["
-            u"\U0001F600-\U0001F64F"  # emoticons
-            u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-            u"\U0001F680-\U0001F6FF"  # transport & map symbols
-            u"\U0001F1E0-\U0001F1FF"  # flags
-            u"\U00002702-\U000027B0"
-            u"\U000024C2-\U0001F251"
-            "]+", flags=re.UNICODE)
-        title = emoji_pattern.sub('', title)
+        title = _EMOJI_RE.sub('', title)
         
         # Remove special characters but keep alphanumeric, spaces, and hyphens
-        title = re.sub(r'[^\w\s\-]', ' ', title)
+        title = _SPECIAL_CHARS_RE.sub(' ', title)
         
         # Normalize whitespace
         title = ' '.join(title.split())
         
         # Fix common model number formats (A7xii -> A7 II, A7riii -> A7R III)
-        title = re.sub(r'([Aa]7)([xXrRsS]?)([iIvV]+)', lambda m: f"{m.group(1)}{m.group(2).upper()} {m.group(3).upper()}", title)
+        title = _MODEL_NUMBER_RE.sub(_format_model_number, title)
         
         return title.strip()
     
@@ -107,43 +205,15 @@ class EbayQueryOptimizer:
                 model="claude-3-haiku-20240307",
                 max_tokens=300,
                 temperature=0,
-                system="""You are an expert at extracting product information from Facebook Marketplace listings for eBay price comparison.
-
-Your task: Extract the PRIMARY product being sold. Use BOTH the title AND description to identify the exact product.
-
-IMPORTANT: The title may be vague (like "Great deal!" or "Must sell!") but the description usually contains the actual product details. READ THE DESCRIPTION CAREFULLY.
-
-RULES:
-1. PRIMARY PRODUCT: Extract the main item being sold (brand + model + key specs)
-   - Look in the description for brand names, model numbers, specifications
-   - Fix common typos and abbreviations
-   - Include important specs like storage size, color, generation
-   - Keep it concise but specific enough to find the exact product on eBay
-   
-2. ACCESSORIES: Additional items included that have independent resale value
-   - Only include items with brand names that can be searched separately
-   - Skip generic items like "cables", "box", "manual", "charger"
-
-3. CATEGORY: electronics, camera, phone, computer, gaming, audio, furniture, clothing, tools, sports, other
-
-Return JSON format:
-{"primary": "exact eBay search query", "accessories": ["item1", "item2"], "category": "category"}
-
-EXAMPLES:
-Title: "Great camera deal!" Description: "Selling my Sony A7 III with original box..." → {"primary": "Sony A7 III", "accessories": [], "category": "camera"}
-Title: "Moving sale" Description: "iPhone 14 Pro 256GB Space Black, excellent condition" → {"primary": "iPhone 14 Pro 256GB", "accessories": [], "category": "phone"}
-Title: "Sony A7xii (LENS NOT INCLUDED)" → {"primary": "Sony A7 II", "accessories": [], "category": "camera"}
-
-Return ONLY valid JSON, nothing else.""",
+                system=_EXTRACTION_SYSTEM_PROMPT,
                 messages=[{"role": "user", "content": user_input}]
             )
             
-            import json
-            result_text = response.content[0].text.strip()
+            result_text = _strip_code_fence(response.content[0].text.strip())
             
             # Parse JSON response
             try:
-                parsed = json.loads(result_text)
+                parsed = orjson.loads(result_text)
                 primary = parsed.get("primary", "")
                 accessories = parsed.get("accessories", [])
                 category = parsed.get("category", "other")
@@ -155,7 +225,7 @@ Return ONLY valid JSON, nothing else.""",
                         "category_hint": category,
                         "original_title": title
                     }
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 # If JSON parsing fails, use the raw text as primary
                 if result_text and 3 < len(result_text) < 100:
                     return {
@@ -183,10 +253,10 @@ Return ONLY valid JSON, nothing else.""",
         
         for i, word in enumerate(filtered):
             # Check if it's a known brand
-            is_brand = any(word in brands for brands in self.BRANDS.values())
+            is_brand = word in self.BRAND_WORDS
             
             # Check if it looks like a model number (contains digits)
-            has_digits = bool(re.search(r'\d', word))
+            has_digits = _DIGIT_RE.search(word) is not None
             
             if is_brand or has_digits or len(primary_parts) < 3:
                 primary_parts.append(word)
@@ -209,26 +279,9 @@ Return ONLY valid JSON, nothing else.""",
         # Remove the primary product from title
         remaining = title.lower().replace(primary.lower(), '')
         
-        # Common accessory patterns - more specific for better eBay search
-        accessory_patterns = [
-            r'(g-?master\s+lens(?:es)?)',  # Sony G-Master lenses
-            r'(gm\s+lens(?:es)?)',
-            r'(godox\s+\w+)',  # Godox flash/trigger
-            r'(sigma\s+\d+(?:-\d+)?(?:mm)?)',  # Sigma lenses
-            r'(tamron\s+\d+(?:-\d+)?(?:mm)?)',  # Tamron lenses
-            r'(\d+(?:-\d+)?mm\s+(?:f/?[\d.]+\s+)?lens)',  # Generic lens with focal length
-            r'(\w+\s+flash)',
-            r'(\w+\s+trigger)',
-            r'(\w+\s+controller(?:s)?)',
-            r'(\w+\s+battery\s+grip)',
-            r'(magic\s+mouse)',
-            r'(magic\s+keyboard)',
-            r'(airpods?\s*(?:pro)?)',
-        ]
-        
         accessories = []
-        for pattern in accessory_patterns:
-            matches = re.findall(pattern, remaining, re.IGNORECASE)
+        for pattern in _ACCESSORY_PATTERNS:
+            matches = pattern.findall(remaining)
             for match in matches:
                 clean = match.strip()
                 if clean and len(clean) > 3 and clean not in accessories:
@@ -238,24 +291,14 @@ Return ONLY valid JSON, nothing else.""",
     
     def _detect_category(self, query: str) -> str:
         """Detect the likely eBay category"""
-        query_lower = query.lower()
-        
-        # Camera keywords
-        if any(kw in query_lower for kw in ['sony a7', 'canon eos', 'nikon', 'fuji', 'camera', 'lens']):
-            return "Cameras & Photo"
-        
-        # Phone keywords
-        if any(kw in query_lower for kw in ['iphone', 'samsung', 'galaxy', 'pixel', 'phone']):
-            return "Cell Phones & Accessories"
-        
-        # Computer keywords
-        if any(kw in query_lower for kw in ['macbook', 'laptop', 'dell', 'hp', 'lenovo', 'computer']):
-            return "Computers/Tablets & Networking"
-        
-        # Gaming keywords
-        if any(kw in query_lower for kw in ['ps5', 'playstation', 'xbox', 'nintendo', 'switch', 'gaming']):
-            return "Video Games & Consoles"
+        best = len(_CATEGORY_KEYWORDS)
+        for match in _CATEGORY_RE.finditer(query.lower()):
+            best = min(best, _KEYWORD_PRIORITY[match.group(1)])
+            if best == 0:
+                break
         
+        if best < len(_CATEGORY_KEYWORDS):
+            return _CATEGORY_KEYWORDS[best][0]
         return "All Categories"
 
 
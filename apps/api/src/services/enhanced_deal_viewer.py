@@ -11,6 +11,8 @@ from ..models.deal import Deal, DealRating
 
 logger = logging.getLogger(__name__)
 
+_NON_NUMERIC_RE = re.compile(r'[^\d.]')
+
 
 class EnhancedDealViewer:
     """
@@ -39,7 +41,7 @@ class EnhancedDealViewer:
         
         if isinstance(price_raw, str):
             # Extract numeric value from string like "$1,234" or "1234"
-            clean = re.sub(r'[^\d.]', '', price_raw)
+            clean = _NON_NUMERIC_RE.sub('', price_raw)
             try:
                 return float(clean) if clean else 0
             except ValueError:
@@ -3,19 +3,36 @@ Negotiation manager - Handles persistence and retrieval of negotiations.
 """
 
 import logging
-from typing import List, Optional
+import time
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
 from src.models import Negotiation, NegotiationCreate, Listing
 from src.db import get_pg_pool
-from .state_machine import NegotiationStateMachine
+from .state_machine import NegotiationStateMachine, utc_timestamp
 
 logger = logging.getLogger(__name__)
 
+# Negotiation with its listing nested as JSONB - one query, no second lookup
+NEGOTIATION_WITH_LISTING_SQL = """
+    SELECT n.*, to_jsonb(l.*) AS listing
+    FROM negotiations n
+    LEFT JOIN listings l ON l.id = n.listing_id
+"""
+
 
 class NegotiationManager:
     """Manage negotiation persistence and lifecycle"""
     
+    # Live state machines keyed by negotiation ID, shared across manager
+    # instances (routers create one per request). Entries older than the
+    # TTL are reloaded from the database. Each entry keeps the row's
+    # updated_at so a write from a machine another worker has since
+    # overtaken is rejected instead of clobbering the newer row.
+    MACHINE_CACHE_TTL = 30  # seconds
+    MACHINE_CACHE_SIZE = 1024
+    _machines: Dict[int, Tuple[NegotiationStateMachine, datetime, float]] = {}
+    
     async def create_negotiation(
         self, 
         listing: Listing, 
@@ -55,6 +72,8 @@ class NegotiationManager:
                 []
             )
             
+            self._put_machine(row['id'], machine, row['updated_at'])
+            
             return Negotiation(
                 id=row['id'],
                 listing_id=listing.id,
@@ -66,6 +85,7 @@ class NegotiationManager:
                 messages=[],
                 created_at=row['created_at'],
                 updated_at=row['updated_at'],
+                listing=listing,
                 suggested_offer=initial_state['suggested_offer'],
                 suggested_message=initial_state['suggested_message']
             )
@@ -82,25 +102,15 @@ class NegotiationManager:
         """
         pool = get_pg_pool()
         async with pool.acquire() as conn:
-            row = await conn.fetchrow("""
-                SELECT * FROM negotiations WHERE id = $1
+            row = await conn.fetchrow(f"""
+                {NEGOTIATION_WITH_LISTING_SQL}
+                WHERE n.id = $1
             """, negotiation_id)
             
             if not row:
                 return None
             
-            return Negotiation(
-                id=row['id'],
-                listing_id=row['listing_id'],
-                state=row['state'],
-                asking_price=row['asking_price'],
-                current_offer=row['current_offer'],
-                max_budget=row['max_budget'],
-                round_number=row['round_number'],
-                messages=row['messages'],
-                created_at=row['created_at'],
-                updated_at=row['updated_at']
-            )
+            return self._row_to_negotiation(row)
     
     async def list_negotiations(
         self, 
@@ -118,32 +128,18 @@ class NegotiationManager:
         pool = get_pg_pool()
         async with pool.acquire() as conn:
             if state:
-                rows = await conn.fetch("""
-                    SELECT * FROM negotiations 
-                    WHERE state = $1
-                    ORDER BY updated_at DESC
+                rows = await conn.fetch(f"""
+                    {NEGOTIATION_WITH_LISTING_SQL}
+                    WHERE n.state = $1
+                    ORDER BY n.updated_at DESC
                 """, state)
             else:
-                rows = await conn.fetch("""
-                    SELECT * FROM negotiations 
-                    ORDER BY updated_at DESC
+                rows = await conn.fetch(f"""
+                    {NEGOTIATION_WITH_LISTING_SQL}
+                    ORDER BY n.updated_at DESC
                 """)
             
-            return [
-                Negotiation(
-                    id=row['id'],
-                    listing_id=row['listing_id'],
-                    state=row['state'],
-                    asking_price=row['asking_price'],
-                    current_offer=row['current_offer'],
-                    max_budget=row['max_budget'],
-                    round_number=row['round_number'],
-                    messages=row['messages'],
-                    created_at=row['created_at'],
-                    updated_at=row['updated_at']
-                )
-                for row in rows
-            ]
+            return [self._row_to_negotiation(row) for row in rows]
     
     async def update_negotiation(
         self,
@@ -162,17 +158,92 @@ class NegotiationManager:
         Returns:
             Updated Negotiation object
         """
-        # Get current negotiation
-        negotiation = await self.get_negotiation(negotiation_id)
-        if not negotiation:
-            raise ValueError(f"Negotiation {negotiation_id} not found")
+        if action not in ("send_offer", "receive_response"):
+            raise ValueError(f"Unknown action: {action}")
+        
+        # One timestamp per request
+        timestamp = utc_timestamp()
+        
+        # Reuse the cached state machine if it is fresh. The UPDATE only
+        # applies if the row is still at the version the machine was built
+        # from; if another worker got there first, rebuild from the database
+        # and apply the action once more.
+        cached = self._pop_machine(negotiation_id)
+        for _ in range(2):
+            if cached is None:
+                negotiation = await self.get_negotiation(negotiation_id)
+                if not negotiation:
+                    raise ValueError(f"Negotiation {negotiation_id} not found")
+                machine = self._build_machine(negotiation)
+                version = negotiation.updated_at
+            else:
+                machine, version = cached
+            
+            if action == "send_offer":
+                result = machine.send_offer(
+                    data.get('offer'),
+                    data.get('message'),
+                    timestamp
+                )
+            else:
+                result = machine.receive_response(
+                    data.get('seller_message'),
+                    data.get('seller_counter'),
+                    timestamp
+                )
+            
+            # Update database (appending only unsaved messages) and read back
+            # the joined row in one round-trip
+            new_messages = machine.messages[machine.last_persisted_message_count:]
+            pool = get_pg_pool()
+            async with pool.acquire() as conn:
+                row = await conn.fetchrow("""
+                    WITH n AS (
+                        UPDATE negotiations
+                        SET state = $1, current_offer = $2, round_number = $3,
+                            messages = messages || $4::jsonb, updated_at = NOW()
+                        WHERE id = $5 AND updated_at = $6
+                        RETURNING *
+                    )
+                    SELECT n.*, to_jsonb(l.*) AS listing
+                    FROM n
+                    LEFT JOIN listings l ON l.id = n.listing_id
+                """,
+                    machine.state,
+                    machine.current_offer,
+                    machine.round,
+                    new_messages,
+                    negotiation_id,
+                    version
+                )
+            
+            if row:
+                break
+            
+            # Row is gone or was changed by another worker - reload it
+            cached = None
+        else:
+            raise ValueError(f"Negotiation {negotiation_id} was modified concurrently, try again")
+        
+        machine.last_persisted_message_count = len(machine.messages)
+        self._put_machine(negotiation_id, machine, row['updated_at'])
+        updated = self._row_to_negotiation(row)
+        
+        # Add suggested actions from result
+        if 'suggested_offer' in result:
+            updated.suggested_offer = result['suggested_offer']
+        if 'suggested_message' in result:
+            updated.suggested_message = result['suggested_message']
+        if 'recommended_action' in result:
+            updated.recommended_action = result['recommended_action']
         
-        # Reconstruct state machine
-        # Note: In production, you'd fetch the listing from DB
-        from src.models import Listing
-        listing = Listing(
+        return updated
+    
+    def _build_machine(self, negotiation: Negotiation) -> NegotiationStateMachine:
+        """Reconstruct a state machine from a persisted negotiation"""
+        listing = negotiation.listing or Listing(
             id=negotiation.listing_id,
-            title="",  # Would fetch from DB
+            title="",
             price="",
             url="",
             scraped_at=datetime.now(),
@@ -181,50 +252,53 @@ class NegotiationManager:
         )
         
         machine = NegotiationStateMachine(listing, negotiation.max_budget)
+        machine.asking_price = negotiation.asking_price
         machine.state = negotiation.state
         machine.current_offer = negotiation.current_offer
         machine.round = negotiation.round_number
         machine.messages = negotiation.messages
+        machine.last_persisted_message_count = len(negotiation.messages)
+        return machine
+    
+    def _pop_machine(
+        self, negotiation_id: int
+    ) -> Optional[Tuple[NegotiationStateMachine, datetime]]:
+        """Take a cached state machine and its row version out of the cache if still fresh"""
+        entry = self._machines.pop(negotiation_id, None)
+        if entry is None:
+            return None
         
-        # Perform action
-        if action == "send_offer":
-            result = machine.send_offer(
-                data.get('offer'),
-                data.get('message')
-            )
-        elif action == "receive_response":
-            result = machine.receive_response(
-                data.get('seller_message'),
-                data.get('seller_counter')
-            )
-        else:
-            raise ValueError(f"Unknown action: {action}")
-        
-        # Update database
-        pool = get_pg_pool()
-        async with pool.acquire() as conn:
-            await conn.execute("""
-                UPDATE negotiations
-                SET state = $1, current_offer = $2, round_number = $3,
-                    messages = $4, updated_at = NOW()
-                WHERE id = $5
-            """,
-                machine.state,
-                machine.current_offer,
-                machine.round,
-                machine.messages,
-                negotiation_id
-            )
-        
-        # Return updated negotiation
-        updated = await self.get_negotiation(negotiation_id)
-        
-        # Add suggested actions from result
-        if 'suggested_offer' in result:
-            updated.suggested_offer = result['suggested_offer']
-        if 'suggested_message' in result:
-            updated.suggested_message = result['suggested_message']
-        if 'recommended_action' in result:
-            updated.recommended_action = result['recommended_action']
+        machine, updated_at, cached_at = entry
+        if time.monotonic() - cached_at > self.MACHINE_CACHE_TTL:
+            return None
+        return machine, updated_at
+    
+    def _put_machine(
+        self,
+        negotiation_id: int,
+        machine: NegotiationStateMachine,
+        updated_at: datetime
+    ):
+        """Cache a state machine with the updated_at of the row it matches, evicting the oldest entry when full"""
+        self._machines.pop(negotiation_id, None)
+        if len(self._machines) >= self.MACHINE_CACHE_SIZE:
+            self._machines.pop(next(iter(self._machines)))
+        self._machines[negotiation_id] = (machine, updated_at, time.monotonic())
+    
+    def _row_to_negotiation(self, row) -> Negotiation:
+        """Convert a negotiation row (with nested listing JSONB) to a Negotiation"""
+        listing_data = row['listing']
         
-        return updated
+        return Negotiation(
+            id=row['id'],
+            listing_id=row['listing_id'],
+            state=row['state'],
+            asking_price=row['asking_price'],
+            current_offer=row['current_offer'],
+            max_budget=row['max_budget'],
+            round_number=row['round_number'],
+            messages=row['messages'],
+            created_at=row['created_at'],
+            updated_at=row['updated_at'],
+            listing=Listing(**listing_data) if listing_data else None
+        )
@@ -3,16 +3,75 @@ Negotiation state machine - Pure Python implementation.
 Uses LLM for message generation and response analysis.
 """
 
+import functools
 import logging
-import os
+import re
 from typing import Dict, Optional, List
-from datetime import datetime
-import anthropic
+from datetime import datetime, timezone
 
 from src.models import Listing, NegotiationState
+from src.services._anthropic import get_client
 
 logger = logging.getLogger(__name__)
 
+# Fast-path patterns for obvious seller replies (checked before any LLM call).
+# They must match the whole reply: a keyword inside a longer message ("not
+# sure, that is pretty low", "yes it's available, but i need 200") can mean
+# the opposite, so anything beyond a bare phrase goes to the LLM.
+_RE_ACCEPT = re.compile(
+    r"(?:yes|yep|ok(?:ay)?|sure|deal|sounds good|i.?ll take it)"
+    r"(?:[,!. ]+(?:yes|ok(?:ay)?|sure|deal|sounds good|i.?ll take it))*[.! ]*",
+    re.I
+)
+_RE_REJECT = re.compile(
+    r"(?:no|nope|no thanks|no deal|not interested|too low|pass)"
+    r"(?:[,!. ]+(?:no thanks|no deal|not interested|too low|pass))*[.! ]*",
+    re.I
+)
+
+# Offline fallback classifier - one case-insensitive pass, group name = intent.
+# Word boundaries keep "no" from matching inside "know" or "ok" inside "took",
+# "no deal" is consumed whole so its "deal" isn't read as acceptance, and an
+# accepting word right after "not"/"n't" ("not sure", "isn't ok") is skipped.
+_FALLBACK_INTENT_RE = re.compile(
+    r"\b(?:(?<!not )(?<!n't )(?P<acceptance>yes|deal|ok(?:ay)?|sure)"
+    r"|(?P<rejection>no deal|no thanks|not interested|too low|no))\b",
+    re.I
+)
+
+# Tool schema for seller intent - forces a pre-validated structured reply
+INTENT_TOOL = {
+    "name": "emit_intent",
+    "description": "Record the seller's intent in a marketplace negotiation.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "intent": {"enum": ["acceptance", "rejection", "counter", "unclear"]},
+            "confidence": {"type": "integer"},
+            "reasoning": {"type": "string"}
+        },
+        "required": ["intent", "confidence"]
+    }
+}
+
+
+def utc_timestamp() -> str:
+    """ISO-8601 UTC timestamp (second precision) for message records"""
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+@functools.lru_cache(maxsize=1024)
+def _fast_intent(normalized_message: str) -> Optional[str]:
+    """
+    Classify bare accept/reject replies ("ok deal!", "no thanks") without
+    an LLM call. Returns None for anything longer or ambiguous.
+    """
+    accept = _RE_ACCEPT.fullmatch(normalized_message) is not None
+    reject = _RE_REJECT.fullmatch(normalized_message) is not None
+    if accept == reject:
+        return None
+    return "acceptance" if accept else "rejection"
+
 
 class NegotiationStateMachine:
     """
@@ -20,10 +79,10 @@ class NegotiationStateMachine:
     Uses Claude Haiku for intelligent message generation and response analysis.
     """
     
-    STATES = [
+    STATES = (
         "idle", "composing", "sent", "awaiting", 
         "countering", "accepted", "rejected", "abandoned"
-    ]
+    )
     
     def __init__(self, listing: Listing, max_budget: int):
         self.listing = listing
@@ -33,10 +92,11 @@ class NegotiationStateMachine:
         self.state = "idle"
         self.round = 0
         self.messages: List[Dict] = []
+        # Messages already stored in the database (rest are appended on persist)
+        self.last_persisted_message_count = 0
         
-        # Initialize LLM client
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        self.client = anthropic.Anthropic(api_key=api_key) if api_key else None
+        # Shared LLM client (None if no API key configured)
+        self.client = get_client()
         self.use_llm = self.client is not None
     
     def start(self) -> Dict:
@@ -64,13 +124,19 @@ class NegotiationStateMachine:
             "round": self.round
         }
     
-    def send_offer(self, offer: int, message: str) -> Dict:
+    def send_offer(
+        self, 
+        offer: int, 
+        message: str, 
+        timestamp: Optional[str] = None
+    ) -> Dict:
         """
         Record that an offer was sent.
         
         Args:
             offer: Offer amount
             message: Message sent to seller
+            timestamp: Precomputed ISO timestamp (defaults to now, UTC)
             
         Returns:
             Updated state dict
@@ -83,7 +149,7 @@ class NegotiationStateMachine:
             "role": "user",
             "content": message,
             "amount": offer,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp or utc_timestamp()
         })
         
         self.state = "awaiting"
@@ -93,7 +159,8 @@ class NegotiationStateMachine:
     def receive_response(
         self, 
         seller_message: str, 
-        seller_counter: Optional[int] = None
+        seller_counter: Optional[int] = None,
+        timestamp: Optional[str] = None
     ) -> Dict:
         """
         Process seller's response and determine next action.
@@ -101,6 +168,7 @@ class NegotiationStateMachine:
         Args:
             seller_message: Seller's message
             seller_counter: Seller's counter offer (if any)
+            timestamp: Precomputed ISO timestamp (defaults to now, UTC)
             
         Returns:
             Dict with state, recommended_action, suggested_counter
@@ -113,7 +181,7 @@ class NegotiationStateMachine:
             "role": "seller",
             "content": seller_message,
             "amount": seller_counter,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp or utc_timestamp()
         })
         
         # Analyze response using LLM
@@ -202,20 +270,18 @@ class NegotiationStateMachine:
         Returns:
             New offer amount
         """
-        # Decreasing concession rates per round
-        concession_rates = [0.50, 0.40, 0.30, 0.20, 0.15]
-        rate = concession_rates[min(self.round - 1, len(concession_rates) - 1)]
+        # Decreasing concession per round, in percent: 50, 40, 30, 20, then 15
+        rate = 50 - 10 * (max(self.round, 1) - 1)
+        rate = 15 if rate < 15 else rate
         
         gap = seller_counter - self.current_offer
-        concession = gap * rate
-        new_offer = self.current_offer + concession
+        new_offer = self.current_offer + (gap * rate) // 100
         
-        # Check for convergence (within 5% of asking)
-        if abs(seller_counter - new_offer) < self.asking_price * 0.05:
-            # Split the difference
-            new_offer = (seller_counter + new_offer) / 2
+        # Converged (within 5% of asking) -> split the difference
+        if abs(seller_counter - new_offer) * 20 < self.asking_price:
+            new_offer = (seller_counter + new_offer) >> 1
         
-        return int(new_offer)
+        return new_offer
     
     def _generate_message(self, message_type: str, context: Optional[Dict] = None) -> str:
         """
@@ -294,6 +360,12 @@ Thank them for their time but decline politely."""
         Returns:
             Dict with intent and analysis
         """
+        # Obvious replies with no counter skip the LLM round-trip
+        if seller_counter is None:
+            intent = _fast_intent(" ".join(seller_message.lower().split()))
+            if intent:
+                return {"intent": intent, "confidence": 95}
+        
         if not self.use_llm:
             return self._fallback_analysis(seller_message, seller_counter)
         
@@ -303,13 +375,6 @@ Thank them for their time but decline politely."""
 Seller's Message: "{seller_message}"
 Seller's Counter Price: ${seller_counter if seller_counter else 'None'}
 
-Determine the seller's intent. Return ONLY valid JSON:
-{{
-  "intent": "<acceptance|rejection|counter|unclear>",
-  "confidence": <0-100>,
-  "reasoning": "<brief explanation>"
-}}
-
 Intent definitions:
 - acceptance: Seller agrees to the offer
 - rejection: Seller firmly declines
@@ -318,18 +383,19 @@ Intent definitions:
 
             response = self.client.messages.create(
                 model="claude-3-haiku-20240307",
-                max_tokens=150,
+                max_tokens=80,
                 temperature=0.3,
-                system="You are analyzing marketplace negotiation responses. Return only valid JSON.",
+                system="You are analyzing marketplace negotiation responses.",
+                tools=[INTENT_TOOL],
+                tool_choice={"type": "tool", "name": "emit_intent"},
                 messages=[{"role": "user", "content": prompt}]
             )
             
-            import json
-            text = response.content[0].text.strip()
-            if '```json' in text:
-                text = text.split('```json')[1].split('```')[0].strip()
-            
-            return json.loads(text)
+            # Tool input is already parsed and schema-checked
+            return next(
+                block.input for block in response.content
+                if block.type == "tool_use"
+            )
             
         except Exception as e:
             logger.error(f"Response analysis failed: {e}")
@@ -350,12 +416,12 @@ Intent definitions:
     
     def _fallback_analysis(self, seller_message: str, seller_counter: Optional[int]) -> Dict:
         """Fallback analysis when LLM unavailable"""
-        message_lower = seller_message.lower()
+        # Simple keyword matching - acceptance wins if both appear
+        intents = {m.lastgroup for m in _FALLBACK_INTENT_RE.finditer(seller_message)}
         
-        # Simple keyword matching
-        if any(word in message_lower for word in ["yes", "deal", "sold", "ok", "sure"]):
+        if "acceptance" in intents:
             return {"intent": "acceptance", "confidence": 70}
-        elif any(word in message_lower for word in ["no", "not interested", "too low"]):
+        elif "rejection" in intents:
             return {"intent": "rejection", "confidence": 70}
         elif seller_counter:
             return {"intent": "counter", "confidence": 90}
@@ -3,9 +3,11 @@ Hot deal detection and filtering.
 """
 
 import logging
+import time
 from typing import List, Optional
 
 from src.models import Listing, Deal, DealRating
+from src.services._anthropic import get_client
 from .scorer import DealScorer
 
 logger = logging.getLogger(__name__)
@@ -14,6 +16,8 @@ logger = logging.getLogger(__name__)
 class HotDealDetector:
     """Detect and filter hot deals from listings"""
     
+    TRENDING_CACHE_TTL = 3600  # seconds
+    
     def __init__(self):
         self.scorer = DealScorer()
         self._trending_cache = None
@@ -53,22 +57,17 @@ class HotDealDetector:
         Returns:
             List of category names
         """
-        import anthropic
-        import os
-        from datetime import datetime, timedelta
-        
         # Check cache
         if self._trending_cache and self._cache_time:
-            if datetime.now() - self._cache_time < timedelta(hours=1):
+            if time.monotonic() - self._cache_time < self.TRENDING_CACHE_TTL:
                 return self._trending_cache
         
         # Get from LLM
         try:
-            api_key = os.getenv("ANTHROPIC_API_KEY")
-            if not api_key:
+            client = get_client()
+            if not client:
                 return ["electronics", "gaming", "apple products"]  # Fallback
             
-            client = anthropic.Anthropic(api_key=api_key)
             response = client.messages.create(
                 model="claude-3-haiku-20240307",
                 max_tokens=150,
@@ -85,7 +84,7 @@ class HotDealDetector:
             
             # Cache results
             self._trending_cache = categories
-            self._cache_time = datetime.now()
+            self._cache_time = time.monotonic()
             
             return categories
             
@@ -3,16 +3,80 @@ Deal scoring algorithm - Agentic workflow using Claude Haiku.
 Uses LLM to evaluate market value and deal quality.
 """
 
+import asyncio
+import hashlib
 import logging
-import os
-import json
-from typing import Optional, Dict
-import anthropic
+import re
+from collections import OrderedDict
+from typing import Optional, Dict, List, Tuple
+import orjson
 
 from src.models import Listing, Deal, DealRating
+from src.db import get_redis
+from src.services._anthropic import get_client, get_async_client, get_llm_semaphore
 
 logger = logging.getLogger(__name__)
 
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+# Static scoring instructions - sent as a cached system prompt prefix
+SCORING_RUBRIC = """You are a marketplace resale expert. Each input line is a Facebook Marketplace listing: id|title|price|location.
+Estimate realistic used resale value, and profit after 5% Facebook fee and 6.25% purchase tax.
+Output one compact JSON object per listing, one per line, nothing else:
+{"id":<id>,"market_value":<number>,"category":"<category>","score":<0-100>,"rating":"<HOT|GOOD|FAIR|PASS>","profit_estimate":<number>,"roi_percent":<number>,"why_standout":"<brief reason>"}"""
+
+
+class _JsonObjectScanner:
+    """
+    Pull complete top-level {...} objects out of model output, skipping any
+    prose or truncated trailing object around them.
+    """
+    
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.start = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+    
+    def feed(self, chunk: str) -> List[str]:
+        """Add text and return the raw objects completed by it"""
+        self.buffer += chunk
+        buf = self.buffer
+        objects = []
+        
+        for i in range(self.pos, len(buf)):
+            c = buf[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == '\\':
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+            elif c == '"':
+                self.in_string = True
+            elif c == '{':
+                if self.depth == 0:
+                    self.start = i
+                self.depth += 1
+            elif c == '}' and self.depth:
+                self.depth -= 1
+                if self.depth == 0:
+                    objects.append(buf[self.start:i + 1])
+        
+        # Drop text that can no longer be part of an object
+        if self.depth:
+            self.buffer = buf[self.start:]
+            self.start = 0
+        else:
+            self.buffer = ""
+        self.pos = len(self.buffer)
+        
+        return objects
+
 
 class DealScorer:
     """
@@ -20,9 +84,28 @@ class DealScorer:
     Cost-optimized: ~$0.002 per listing evaluation.
     """
     
+    # Listings per LLM call (keeps the output under Haiku's 4k token limit)
+    BATCH_SIZE = 15
+    # Output budget per listing - one compact JSON line is ~100 tokens
+    TOKENS_PER_LISTING = 150
+    # Evaluation cache: in-process LRU shared by all scorers, backed by Redis
+    CACHE_SIZE = 4096
+    CACHE_TTL = 86400  # 24 hours
+    _cache: "OrderedDict[str, Dict]" = OrderedDict()
+    _cache_hits = 0
+    _cache_misses = 0
+    
+    RATING_MAP = {
+        'HOT': DealRating.HOT,
+        'GOOD': DealRating.GOOD,
+        'FAIR': DealRating.FAIR,
+        'PASS': DealRating.PASS
+    }
+    
     def __init__(self):
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        self.client = anthropic.Anthropic(api_key=api_key) if api_key else None
+        # Shared LLM client (None if no API key configured)
+        self.client = get_client()
+        self.async_client = get_async_client()
         self.use_llm = self.client is not None
     
     def score_listing(self, listing: Listing) -> Deal:
@@ -39,10 +122,78 @@ class DealScorer:
             logger.warning("LLM not available, returning neutral score")
             return self._create_neutral_deal(listing)
         
-        try:
-            # Get LLM evaluation
-            evaluation = self._evaluate_with_llm(listing)
+        evaluation = self._cache_get(listing)
+        if evaluation is None:
+            try:
+                results = self._evaluate_with_llm([listing])
+            except Exception as e:
+                logger.error(f"LLM evaluation failed: {e}")
+                results = {}
+            evaluation = self._cache_put(listing, results.get(1))
+        
+        return self._build_deal(listing, evaluation)
+    
+    async def score_listings_async(self, listings: List[Listing]) -> List[Deal]:
+        """
+        Score listings with all batches in flight concurrently.
+        
+        Args:
+            listings: Listings to score
             
+        Returns:
+            Deals in the same order as the listings
+        """
+        if not self.use_llm:
+            logger.warning("LLM not available, returning neutral score")
+            return [self._create_neutral_deal(listing) for listing in listings]
+        
+        evaluations = [self._cache_get(listing) for listing in listings]
+        missing = [i for i, evaluation in enumerate(evaluations) if evaluation is None]
+        
+        # Second tier: evaluations persisted in Redis by any worker
+        if missing:
+            for position, evaluation in zip(missing, await self._redis_get(
+                [listings[i] for i in missing]
+            )):
+                if evaluation is not None:
+                    evaluations[position] = self._cache_put(listings[position], evaluation)
+            missing = [i for i in missing if evaluations[i] is None]
+        
+        chunks = [
+            missing[start:start + self.BATCH_SIZE]
+            for start in range(0, len(missing), self.BATCH_SIZE)
+        ]
+        results = await asyncio.gather(
+            *(self._evaluate_with_llm_async([listings[i] for i in chunk]) for chunk in chunks),
+            return_exceptions=True
+        )
+        
+        fresh = []
+        for positions, batch_results in zip(chunks, results):
+            if isinstance(batch_results, Exception):
+                logger.error(f"LLM evaluation failed: {batch_results}")
+                continue
+            
+            for index, position in enumerate(positions, 1):
+                evaluation = self._cache_put(listings[position], batch_results.get(index))
+                if evaluation is not None:
+                    evaluations[position] = evaluation
+                    fresh.append((listings[position], evaluation))
+        
+        if fresh:
+            await self._redis_set(fresh)
+        
+        return [
+            self._build_deal(listing, evaluation)
+            for listing, evaluation in zip(listings, evaluations)
+        ]
+    
+    def _build_deal(self, listing: Listing, evaluation: Optional[Dict]) -> Deal:
+        """Merge listing data with an LLM evaluation (neutral if missing)"""
+        if not evaluation:
+            return self._create_neutral_deal(listing)
+        
+        try:
             # Parse evaluation results
             rating = self._parse_rating(evaluation.get('rating', 'FAIR'))
             
@@ -63,77 +214,134 @@ class DealScorer:
             return Deal(**listing_data)
             
         except Exception as e:
-            logger.error(f"LLM evaluation failed: {e}")
+            logger.error("Invalid LLM evaluation for listing %s: %s", listing.id, e)
             return self._create_neutral_deal(listing)
     
-    def _evaluate_with_llm(self, listing: Listing) -> Dict:
+    def _evaluate_with_llm(self, listings: List[Listing]) -> Dict[int, Dict]:
         """
-        Use Claude Haiku to evaluate listing and estimate market value.
-        Cost: ~$0.002 per evaluation (Haiku is $0.25/MTok input, $1.25/MTok output)
+        Use Claude Haiku to evaluate a batch of listings in a single call.
+        Cost: ~$0.002 per listing, with the instructions paid once per batch
+        
+        Returns:
+            Evaluations keyed by the listing's 1-based position in the batch
         """
-        prompt = f"""Evaluate this Facebook Marketplace listing as a potential resale opportunity:
-
-Title: {listing.title}
-Price: {listing.price}
-Location: {listing.location or 'Not specified'}
-
-Analyze:
-1. What is the typical market value for this item? (used/resale price)
-2. Is this a good deal for reselling?
-3. What category does this belong to?
-4. Estimated profit after 5% Facebook fee and 6.25% purchase tax
-5. Why does this stand out (or not)?
-
-Return ONLY valid JSON:
-{{
-  "market_value": <typical resale price as number>,
-  "category": "<item category>",
-  "score": <0-100 deal quality score>,
-  "rating": "<HOT|GOOD|FAIR|PASS>",
-  "profit_estimate": <estimated profit as number>,
-  "roi_percent": <ROI percentage as number>,
-  "why_standout": "<brief explanation>"
-}}
-
-Be realistic about market values. Consider condition, demand, and resale velocity."""
-
-        try:
-            response = self.client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=300,
-                temperature=0.3,
-                system="You are a marketplace resale expert. Evaluate deals objectively based on real market data. Return only valid JSON.",
-                messages=[{"role": "user", "content": prompt}]
+        response = self.client.messages.create(**self._build_request(listings))
+        return self._parse_response(response, len(listings))
+    
+    async def _evaluate_with_llm_async(self, listings: List[Listing]) -> Dict[int, Dict]:
+        """Async variant of _evaluate_with_llm, bounded by the shared LLM semaphore"""
+        async with get_llm_semaphore():
+            response = await self.async_client.messages.create(
+                **self._build_request(listings)
             )
-            
-            # Parse JSON response
-            text = response.content[0].text.strip()
-            
-            # Extract JSON if wrapped in markdown
-            if '```json' in text:
-                text = text.split('```json')[1].split('```')[0].strip()
-            elif '```' in text:
-                text = text.split('```')[1].split('```')[0].strip()
-            
-            evaluation = json.loads(text)
-            return evaluation
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse LLM response as JSON: {e}")
-            raise
+        return self._parse_response(response, len(listings))
+    
+    def _build_request(self, listings: List[Listing]) -> Dict:
+        """Build messages.create arguments for a batch of listings"""
+        prompt = "\n".join(
+            f"{i}|{listing.title}|{listing.price}|{listing.location or '-'}"
+            for i, listing in enumerate(listings, 1)
+        )
+        
+        return {
+            "model": "claude-3-haiku-20240307",
+            "max_tokens": min(self.TOKENS_PER_LISTING * len(listings), 4096),
+            "temperature": 0.3,
+            "system": SCORING_RUBRIC,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+    
+    def _parse_response(self, response, count: int) -> Dict[int, Dict]:
+        """Parse a batch response into evaluations keyed by listing number"""
+        if logger.isEnabledFor(logging.DEBUG):
+            usage = response.usage
+            logger.debug(
+                "Scored %d listings: %d input tokens, %d output",
+                count,
+                usage.input_tokens,
+                usage.output_tokens
+            )
+        
+        # One object per line; parse each on its own so a malformed item
+        # (or a response cut off at max_tokens) only loses that listing.
+        # Anything outside the braces, such as a markdown fence, is skipped.
+        evaluations = []
+        for raw in _JsonObjectScanner().feed(response.content[0].text):
+            try:
+                evaluations.append(orjson.loads(raw))
+            except orjson.JSONDecodeError:
+                logger.warning("Skipping malformed evaluation: %.80s", raw)
+        
+        # Map results back to listings by id
+        return {
+            item['id']: item
+            for item in evaluations
+            if isinstance(item, dict) and isinstance(item.get('id'), int)
+        }
+    
+    @staticmethod
+    def _cache_key(listing: Listing) -> str:
+        """Cache key from normalized title, rounded price and location"""
+        title = _WHITESPACE_RE.sub(' ', listing.title.lower().strip())
+        price = round(listing.price_value or 0)
+        location = (listing.location or '').lower().strip()
+        digest = hashlib.blake2b(
+            f"{title}|{price}|{location}".encode(), digest_size=16
+        ).hexdigest()
+        return f"deal_eval:{digest}"
+    
+    def _cache_get(self, listing: Listing) -> Optional[Dict]:
+        """Look up a cached evaluation in the in-process LRU"""
+        cls = DealScorer
+        key = self._cache_key(listing)
+        evaluation = cls._cache.get(key)
+        
+        if evaluation is None:
+            cls._cache_misses += 1
+            return None
+        
+        cls._cache.move_to_end(key)
+        cls._cache_hits += 1
+        if cls._cache_hits % 100 == 0:
+            total = cls._cache_hits + cls._cache_misses
+            logger.info("Deal evaluation cache hit rate: %.0f%%", cls._cache_hits / total * 100)
+        return evaluation
+    
+    def _cache_put(self, listing: Listing, evaluation: Optional[Dict]) -> Optional[Dict]:
+        """Store an evaluation in the in-process LRU (no-op for None)"""
+        if evaluation is None:
+            return None
+        
+        cache = DealScorer._cache
+        cache[self._cache_key(listing)] = evaluation
+        if len(cache) > self.CACHE_SIZE:
+            cache.popitem(last=False)
+        return evaluation
+    
+    async def _redis_get(self, listings: List[Listing]) -> List[Optional[Dict]]:
+        """Fetch persisted evaluations from Redis (all None if unavailable)"""
+        try:
+            redis = get_redis()
+            values = await redis.mget([self._cache_key(listing) for listing in listings])
+            return [orjson.loads(value) if value else None for value in values]
         except Exception as e:
-            logger.error(f"LLM evaluation error: {e}")
-            raise
+            logger.warning("Evaluation cache read failed: %s", e)
+            return [None] * len(listings)
+    
+    async def _redis_set(self, entries: List[Tuple[Listing, Dict]]):
+        """Persist (listing, evaluation) pairs to Redis"""
+        try:
+            redis = get_redis()
+            pipe = redis.pipeline(transaction=False)
+            for listing, evaluation in entries:
+                pipe.setex(self._cache_key(listing), self.CACHE_TTL, orjson.dumps(evaluation))
+            await pipe.execute()
+        except Exception as e:
+            logger.warning("Evaluation cache write failed: %s", e)
     
     def _parse_rating(self, rating_str: str) -> DealRating:
         """Convert string rating to enum"""
-        rating_map = {
-            'HOT': DealRating.HOT,
-            'GOOD': DealRating.GOOD,
-            'FAIR': DealRating.FAIR,
-            'PASS': DealRating.PASS
-        }
-        return rating_map.get(rating_str.upper(), DealRating.FAIR)
+        return self.RATING_MAP.get(rating_str.upper(), DealRating.FAIR)
     
     def _create_neutral_deal(self, listing: Listing) -> Deal:
         """Create a neutral deal when LLM is unavailable"""
@@ -3,126 +3,339 @@ Query variation generator - Uses Claude Haiku for intelligent query expansion.
 Generates multiple search variations to maximize coverage.
 """
 
+import asyncio
+import hashlib
 import re
-import os
-from typing import List, Set
-import anthropic
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+import orjson
+
+from src.db import get_redis
+from src.services._anthropic import get_async_client, get_llm_semaphore
+
+VARIATION_SYSTEM_PROMPT = (
+    "Output 4 alternative Facebook Marketplace search queries for the input, "
+    "one per line, no prose. Keep brand names and model numbers exactly as written."
+)
+
+
+# Category keywords
+CATEGORIES = {
+    "electronics": ["laptop", "phone", "tv", "tablet", "camera", "headphones", "speaker"],
+    "furniture": ["couch", "desk", "chair", "table", "bed", "dresser"],
+    "vehicles": ["car", "truck", "motorcycle", "bike", "scooter"],
+    "appliances": ["fridge", "washer", "dryer", "microwave", "dishwasher"],
+    "gaming": ["ps5", "xbox", "nintendo", "switch", "playstation", "console"],
+    "sports": ["bike", "treadmill", "weights", "golf", "tennis"],
+}
+
+# keyword -> categories of that keyword and of every keyword that is a prefix
+# of it, so a longest-first match at a position also covers shorter keywords
+_KEYWORD_CATEGORIES: Dict[str, Set[str]] = {}
+for _keyword in {kw for kws in CATEGORIES.values() for kw in kws}:
+    _KEYWORD_CATEGORIES[_keyword] = {
+        category
+        for category, keywords in CATEGORIES.items()
+        for kw in keywords
+        if _keyword.startswith(kw)
+    }
+
+# Zero-width lookahead: one pass finds a keyword at every position (overlaps included)
+_CATEGORY_RE = re.compile(
+    "(?=(" + "|".join(
+        re.escape(kw) for kw in sorted(_KEYWORD_CATEGORIES, key=len, reverse=True)
+    ) + "))"
+)
+
+
+def _shares_words(original_words: FrozenSet[str], variation: str) -> bool:
+    """Check if variation shares words with the original query's word set"""
+    # Must share at least one word
+    return not original_words.isdisjoint(variation.lower().split())
+
+
+def _canonical(query: str) -> str:
+    """Lowercase and collapse whitespace"""
+    return " ".join(query.lower().split())
+
+
+def _overlap(query_words: FrozenSet[str], variation: str) -> float:
+    """Jaccard word overlap between the query and a variation"""
+    words = frozenset(variation.lower().split())
+    union = len(query_words | words)
+    return len(query_words & words) / union if union else 0.0
+
+
+# Leading list marker on an LLM output line ("- ", "* ", "1. ", "2) ")
+_LIST_MARKER_RE = re.compile(r'^\s*(?:[-*]+|\d+[.)])?\s*')
+
+# Ranked LLM variations per normalized query (LRU, process-wide)
+VARIATION_CACHE_SIZE = 4096
+# Shared Redis tier so every API worker reuses the same variations
+VARIATION_REDIS_TTL = 86400  # 24 hours
+_variation_cache: "OrderedDict[str, Tuple[str, ...]]" = OrderedDict()
+# Lookups currently in progress, keyed by normalized query
+_inflight: Dict[str, "asyncio.Task[Tuple[str, ...]]"] = {}
+
+
+def _parse_variations(normalized_query: str, text: str) -> Tuple[str, ...]:
+    """Parse one-per-line LLM output, keeping lines that share a query word"""
+    variations = []
+    original_words = frozenset(normalized_query.split())
+    
+    for line in text.strip().split('\n'):
+        clean = _LIST_MARKER_RE.sub('', line).strip()
+        if clean and len(clean) > 2:
+            # Basic validation: must share at least one word with original
+            if _shares_words(original_words, clean):
+                variations.append(clean)
+    
+    return tuple(variations)
+
+
+def _rank_variations(normalized_query: str, variations: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    Drop variations that repeat the query or each other once lowercased and
+    whitespace-collapsed (each one costs a marketplace fetch, and marketplace
+    search ignores both), then order by word overlap with the query.
+    """
+    seen = {normalized_query}
+    candidates = []
+    for v in variations:
+        key = _canonical(v)
+        if key not in seen:
+            seen.add(key)
+            candidates.append(v)
+    
+    # Rank by word overlap with the query (stable for ties)
+    query_words = frozenset(normalized_query.split())
+    candidates.sort(key=lambda v: -_overlap(query_words, v))
+    return tuple(candidates)
+
+
+def _variation_params(normalized_query: str) -> Dict:
+    """Haiku request parameters for one normalized query"""
+    return {
+        "model": "claude-3-haiku-20240307",
+        "max_tokens": 40,
+        "temperature": 0.3,
+        "stop_sequences": ["\n\n", "\nExplanation"],
+        "system": VARIATION_SYSTEM_PROMPT,
+        "messages": [{
+            "role": "user",
+            "content": normalized_query
+        }]
+    }
+
+
+def _remember_variations(normalized_query: str, variations: Tuple[str, ...]):
+    """Store variations in the process-wide LRU"""
+    _variation_cache[normalized_query] = variations
+    if len(_variation_cache) > VARIATION_CACHE_SIZE:
+        _variation_cache.popitem(last=False)
+
+
+def _query_digest(normalized_query: str) -> str:
+    """Short stable hash of a normalized query"""
+    return hashlib.blake2b(normalized_query.encode(), digest_size=16).hexdigest()
+
+
+def _redis_key(normalized_query: str) -> str:
+    """Redis key for a normalized query's variations"""
+    return f"qvar:{_query_digest(normalized_query)}"
+
+
+async def _load_variations(normalized_query: str) -> Optional[Tuple[str, ...]]:
+    """Read variations from Redis (None on miss or if Redis is unavailable)"""
+    try:
+        cached = await get_redis().get(_redis_key(normalized_query))
+    except Exception:
+        return None
+    return tuple(orjson.loads(cached)) if cached else None
+
+
+async def _store_variations(normalized_query: str, variations: Tuple[str, ...]):
+    """Write variations to Redis, ignoring failures"""
+    try:
+        await get_redis().setex(
+            _redis_key(normalized_query),
+            VARIATION_REDIS_TTL,
+            orjson.dumps(list(variations))
+        )
+    except Exception:
+        pass
+
+
+async def _llm_variations(normalized_query: str) -> Tuple[str, ...]:
+    """
+    Deduped, ranked Claude Haiku variations of a normalized (lowercased,
+    whitespace-collapsed) query. Output at temperature 0.3 is near-stable,
+    so results are memoized per process; failures raise and are not cached.
+    Concurrent callers for the same query share one in-flight lookup.
+    """
+    cached = _variation_cache.get(normalized_query)
+    if cached is not None:
+        _variation_cache.move_to_end(normalized_query)
+        return cached
+    
+    task = _inflight.get(normalized_query)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_variations(normalized_query))
+        _inflight[normalized_query] = task
+        task.add_done_callback(lambda _: _inflight.pop(normalized_query, None))
+    
+    # Shield so one cancelled request doesn't cancel the shared lookup
+    return await asyncio.shield(task)
+
+
+async def _fetch_variations(normalized_query: str) -> Tuple[str, ...]:
+    """Load variations from Redis, or generate and store them"""
+    cached = await _load_variations(normalized_query)
+    if cached is not None:
+        _remember_variations(normalized_query, cached)
+        return cached
+    
+    async with get_llm_semaphore():
+        response = await get_async_client().messages.create(
+            **_variation_params(normalized_query)
+        )
+    
+    variations = _rank_variations(
+        normalized_query, _parse_variations(normalized_query, response.content[0].text)
+    )
+    _remember_variations(normalized_query, variations)
+    await _store_variations(normalized_query, variations)
+    return variations
 
 
 class QueryGenerator:
     """Generate query variations using Claude Haiku (cost-optimized)"""
     
     def __init__(self):
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        self.client = anthropic.Anthropic(api_key=api_key) if api_key else None
+        # Shared async LLM client (None if no API key configured)
+        self.client = get_async_client()
         self.use_llm = self.client is not None
     
     # Category keywords
-    CATEGORIES = {
-        "electronics": ["laptop", "phone", "tv", "tablet", "camera", "headphones", "speaker"],
-        "furniture": ["couch", "desk", "chair", "table", "bed", "dresser"],
-        "vehicles": ["car", "truck", "motorcycle", "bike", "scooter"],
-        "appliances": ["fridge", "washer", "dryer", "microwave", "dishwasher"],
-        "gaming": ["ps5", "xbox", "nintendo", "switch", "playstation", "console"],
-        "sports": ["bike", "treadmill", "weights", "golf", "tennis"],
-    }
+    CATEGORIES = CATEGORIES
     
-    def generate_variations(self, query: str) -> List[str]:
+    async def generate_variations(self, query: str, n: int = 5) -> List[str]:
         """
-        Generate 3-5 query variations using Claude Haiku.
+        Generate up to n distinct query variations using Claude Haiku.
         
         Args:
             query: Original search query
+            n: Maximum number of variations to return
+            
+        Returns:
+            List of query variations (original first, rest by relevance)
+        """
+        return await self._variations(query.strip(), _canonical(query), n)
+    
+    async def expand_query(self, query: str, n: int = 5) -> Tuple[List[str], List[str]]:
+        """
+        Generate variations and category keywords together, normalizing the
+        query once for both.
+        
+        Args:
+            query: Original search query
+            n: Maximum number of variations to return
+            
+        Returns:
+            Tuple of (query variations, category keywords)
+        """
+        normalized, categories = self._expand_local(query)
+        variations = await self._variations(query.strip(), normalized, n)
+        return variations, categories
+    
+    async def generate_variations_batch(
+        self, 
+        queries: List[str], 
+        poll_interval: float = 30.0
+    ) -> Dict[str, List[str]]:
+        """
+        Generate LLM variations for many queries through the Message Batches
+        API (about half the cost of live calls, results in minutes, not
+        seconds). Meant for background work such as cache warming; results
+        land in the same cache the interactive path reads.
+        
+        Args:
+            queries: Queries to expand
+            poll_interval: Seconds between batch status checks
             
         Returns:
-            List of query variations (including original)
+            Dict mapping each query to its LLM variations (empty if none)
         """
-        # Always start with original
-        variations = [query.strip()]
+        if not self.use_llm:
+            return {}
         
-        # Use LLM to generate variations
-        if self.use_llm:
-            llm_variations = self._generate_with_llm(query)
-            for v in llm_variations:
-                if v not in variations and len(variations) < 5:
-                    variations.append(v)
+        # Only submit queries that aren't cached yet (in this process or in
+        # Redis, since warm-up usually runs in its own process); custom_id
+        # must be short
+        pending = {}
+        for query in queries:
+            norm = _canonical(query)
+            if not norm or norm in _variation_cache:
+                continue
+            cached = await _load_variations(norm)
+            if cached is not None:
+                _remember_variations(norm, cached)
+                continue
+            pending[_query_digest(norm)] = norm
         
-        # If LLM failed or didn't generate enough, add simple fallbacks
-        if len(variations) < 3:
-            # Just add lowercase and title case versions
-            lower = query.lower()
-            if lower not in variations:
-                variations.append(lower)
+        if pending:
+            batch = await self.client.messages.batches.create(
+                requests=[
+                    {"custom_id": custom_id, "params": _variation_params(norm)}
+                    for custom_id, norm in pending.items()
+                ]
+            )
             
-            title = query.title()
-            if title not in variations and len(variations) < 5:
-                variations.append(title)
+            while batch.processing_status != "ended":
+                await asyncio.sleep(poll_interval)
+                batch = await self.client.messages.batches.retrieve(batch.id)
+            
+            async for entry in await self.client.messages.batches.results(batch.id):
+                if entry.result.type != "succeeded":
+                    continue
+                norm = pending[entry.custom_id]
+                variations = _rank_variations(
+                    norm, _parse_variations(norm, entry.result.message.content[0].text)
+                )
+                _remember_variations(norm, variations)
+                await _store_variations(norm, variations)
+        
+        return {
+            query: list(_variation_cache.get(_canonical(query), ()))
+            for query in queries
+        }
+    
+    def _expand_local(self, query: str) -> Tuple[str, List[str]]:
+        """Lowercase and tokenize once: (normalized query, category keywords)"""
+        normalized = _canonical(query)
+        return normalized, self._match_categories(normalized)
+    
+    async def _variations(self, original: str, normalized: str, n: int) -> List[str]:
+        """Original query first, then cached/LLM variations up to n"""
+        # Cached per normalized query already deduped and ranked, so a
+        # repeat search is a dict lookup
+        candidates = []
+        if self.use_llm and n > 1:
+            candidates = await self._generate_with_llm(normalized)
         
-        return variations[:5]
+        return ([original] + candidates)[:n]
     
-    def _generate_with_llm(self, query: str) -> List[str]:
+    async def _generate_with_llm(self, normalized_query: str) -> List[str]:
         """
         Use Claude Haiku to generate intelligent query variations.
-        Cost: ~$0.001 per query (very cheap)
+        Cost: ~$0.001 per query (very cheap), nothing for repeated queries
         """
         try:
-            response = self.client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=200,
-                temperature=0.3,
-                system="""You are a Facebook Marketplace search expert. Generate 4 alternative search queries that would find the same or similar items.
-
-CRITICAL RULES:
-- Keep brand names EXACTLY as written (iPhone stays iPhone, not ismartphone)
-- Keep model numbers EXACTLY as written (15 stays 15, not 13)
-- Only make small variations: add brand prefix, try plural/singular, reorder words slightly
-- Each query MUST be a real, sensible search term someone would actually type
-- Return ONLY the queries, one per line, nothing else
-
-Examples:
-Input: "iPhone 15"
-Output:
-Apple iPhone 15
-iPhone 15 Pro
-iphone 15
-iPhone fifteen
-
-Input: "gaming laptop"
-Output:
-gaming laptop
-laptop for gaming
-gaming laptops
-gaming notebook""",
-                messages=[{
-                    "role": "user",
-                    "content": query
-                }]
-            )
-            
-            # Parse response - be strict
-            text = response.content[0].text.strip()
-            variations = []
-            
-            for line in text.split('\n'):
-                clean = line.strip().strip('-').strip('*').strip().strip('1234567890.').strip()
-                if clean and len(clean) > 2:
-                    # Basic validation: must share at least one word with original
-                    if self._shares_words(query, clean):
-                        variations.append(clean)
-            
-            return variations
+            return list(await _llm_variations(normalized_query))
         except Exception as e:
             print(f"LLM query generation failed: {e}")
             return []
     
-    def _shares_words(self, original: str, variation: str) -> bool:
-        """Check if variation shares words with original"""
-        original_words = set(original.lower().split())
-        variation_words = set(variation.lower().split())
-        
-        # Must share at least one word
-        return len(original_words & variation_words) > 0
-
     def get_category_keywords(self, query: str) -> List[str]:
         """
         Map query to Facebook Marketplace categories.
@@ -133,13 +346,15 @@ gaming notebook""",
         Returns:
             List of matching category keywords
         """
-        query_lower = query.lower()
-        matching_categories = []
+        return self._match_categories(query.lower())
+    
+    def _match_categories(self, query_lower: str) -> List[str]:
+        """Categories whose keywords appear in an already-lowercased query"""
+        matched = set()
+        for match in _CATEGORY_RE.finditer(query_lower):
+            matched |= _KEYWORD_CATEGORIES[match.group(1)]
         
-        for category, keywords in self.CATEGORIES.items():
-            for keyword in keywords:
-                if keyword in query_lower:
-                    matching_categories.append(category)
-                    break
+        # Keep CATEGORIES order
+        matching_categories = [c for c in self.CATEGORIES if c in matched]
         
         return matching_categories or ["general"]
@@ -3,24 +3,42 @@ Search orchestrator - coordinates query generation, URL building, and result ded
 """
 
 import hashlib
-import json
-from typing import List, Set
+import logging
+import zlib
+from typing import List, Optional
 from datetime import timedelta
+import orjson
 
 from src.models import SearchQuery, SearchResult, Listing
-from src.db import get_redis
+from src.db import get_redis_bytes
 from .query_generator import QueryGenerator
 from .url_builder import MarketplaceURLBuilder
 
+logger = logging.getLogger(__name__)
+
+# Stateless helpers shared by every orchestrator (one per request)
+_url_builder = MarketplaceURLBuilder()
+_query_generator: Optional[QueryGenerator] = None
+
+
+def _get_query_generator() -> QueryGenerator:
+    """Shared QueryGenerator, created on first use (after env is loaded)"""
+    global _query_generator
+    if _query_generator is None:
+        _query_generator = QueryGenerator()
+    return _query_generator
+
 
 class SearchOrchestrator:
     """Orchestrate the complete search workflow"""
     
     CACHE_TTL = 300  # 5 minutes
+    # zlib level for cached payloads (repetitive listing JSON shrinks several-fold)
+    CACHE_COMPRESSION_LEVEL = 3
     
     def __init__(self):
-        self.query_generator = QueryGenerator()
-        self.url_builder = MarketplaceURLBuilder()
+        self.query_generator = _get_query_generator()
+        self.url_builder = _url_builder
     
     async def prepare_search(self, search_query: SearchQuery) -> dict:
         """
@@ -33,22 +51,19 @@ class SearchOrchestrator:
         Returns:
             Dict with query_variations and urls_to_scrape
         """
-        # Generate query variations
-        variations = self.query_generator.generate_variations(search_query.query)
+        # Generate query variations and category keywords (query normalized once)
+        variations, categories = await self.query_generator.expand_query(search_query.query)
         
         # Build URLs for each variation
-        urls = []
-        for variation in variations:
-            url = self.url_builder.build_search_url(
+        urls = [
+            self.url_builder.build_search_url(
                 query=variation,
                 min_price=search_query.min_price,
                 max_price=search_query.max_price,
                 location=search_query.location
             )
-            urls.append(url)
-        
-        # Get category keywords
-        categories = self.query_generator.get_category_keywords(search_query.query)
+            for variation in variations
+        ]
         
         return {
             "query_variations": variations,
@@ -56,6 +71,26 @@ class SearchOrchestrator:
             "categories": categories
         }
     
+    async def warm_variations(self, queries: List[str]) -> int:
+        """
+        Pre-generate query variations for non-interactive searches (popular
+        queries, scheduled rescans) through the cheaper batch API, so later
+        prepare_search calls hit the variation cache.
+        
+        Args:
+            queries: Queries to warm
+            
+        Returns:
+            Number of queries that now have LLM variations cached
+        """
+        try:
+            results = await self.query_generator.generate_variations_batch(queries)
+        except Exception as e:
+            logger.error(f"Variation warm-up failed: {e}")
+            return 0
+        
+        return sum(1 for variations in results.values() if variations)
+    
     async def check_cache(self, search_query: SearchQuery) -> SearchResult | None:
         """
         Check if search results are cached.
@@ -67,12 +102,12 @@ class SearchOrchestrator:
             Cached SearchResult or None
         """
         try:
-            redis = get_redis()
+            redis = get_redis_bytes()
             cache_key = self._get_cache_key(search_query)
             
             cached_data = await redis.get(cache_key)
             if cached_data:
-                data = json.loads(cached_data)
+                data = orjson.loads(zlib.decompress(cached_data))
                 return SearchResult(**data)
             
             return None
@@ -89,15 +124,15 @@ class SearchOrchestrator:
             result: Search results to cache
         """
         try:
-            redis = get_redis()
+            redis = get_redis_bytes()
             cache_key = self._get_cache_key(search_query)
             
-            # Convert to dict for JSON serialization
+            # Convert to dict for JSON serialization (orjson handles datetimes natively)
             data = result.model_dump()
             await redis.setex(
                 cache_key,
                 self.CACHE_TTL,
-                json.dumps(data, default=str)
+                zlib.compress(orjson.dumps(data, default=str), self.CACHE_COMPRESSION_LEVEL)
             )
         except Exception:
             # If caching fails, just continue
@@ -113,19 +148,14 @@ class SearchOrchestrator:
         Returns:
             Deduplicated list
         """
-        seen_ids: Set[str] = set()
-        unique_listings = []
-        
-        for listing in listings:
-            if listing.id not in seen_ids:
-                seen_ids.add(listing.id)
-                unique_listings.append(listing)
-        
-        return unique_listings
+        # One dict build: keys keep first-seen order (the latest copy of a
+        # duplicate fills that slot - same item, possibly fresher data)
+        return list({listing.id: listing for listing in listings}.values())
     
     def _get_cache_key(self, search_query: SearchQuery) -> str:
         """Generate cache key from search query"""
         # Create a stable hash of the query parameters
-        query_str = f"{search_query.query}:{search_query.min_price}:{search_query.max_price}:{search_query.location}"
-        hash_obj = hashlib.md5(query_str.encode())
+        # ('|' separator - ':' can appear in free-text locations)
+        query_str = f"{search_query.query}|{search_query.min_price}|{search_query.max_price}|{search_query.location}"
+        hash_obj = hashlib.blake2b(query_str.encode(), digest_size=16)
         return f"search:{hash_obj.hexdigest()}"
@@ -2,9 +2,54 @@
 Facebook Marketplace URL builder.
 """
 
-from urllib.parse import urlencode, quote
+import functools
+import re
+from urllib.parse import quote_plus
 from typing import Optional
 
+# Item ID in a marketplace item URL
+_ITEM_RE = re.compile(r'/marketplace/item/(\d+)')
+
+# Location -> URL slug: spaces become dashes, commas are dropped
+_SLUG_TABLE = str.maketrans({' ': '-', ',': None})
+
+
+@functools.lru_cache(maxsize=512)
+def _search_url(
+    base_url: str,
+    query: str,
+    min_price: Optional[int],
+    max_price: Optional[int],
+    location: Optional[str],
+    days_listed: Optional[int],
+    delivery_method: Optional[str]
+) -> str:
+    """Build a search URL - pure, so repeated searches are memoized"""
+    # Start with base search URL
+    if location:
+        # Location-specific search
+        location_slug = location.lower().translate(_SLUG_TABLE)
+        url = f"{base_url}/{location_slug}/search"
+    else:
+        url = f"{base_url}/search"
+    
+    # Build query string directly (same encoding as urlencode)
+    parts = [f"query={quote_plus(query)}"]
+    
+    if min_price is not None:
+        parts.append(f"minPrice={min_price}")
+    
+    if max_price is not None:
+        parts.append(f"maxPrice={max_price}")
+    
+    if days_listed:
+        parts.append(f"daysSinceListed={days_listed}")
+    
+    if delivery_method:
+        parts.append(f"deliveryMethod={quote_plus(delivery_method)}")
+    
+    return f"{url}?{'&'.join(parts)}"
+
 
 class MarketplaceURLBuilder:
     """Build Facebook Marketplace search URLs"""
@@ -34,32 +79,10 @@ class MarketplaceURLBuilder:
         Returns:
             Complete marketplace search URL
         """
-        # Start with base search URL
-        if location:
-            # Location-specific search
-            location_slug = location.lower().replace(' ', '-').replace(',', '')
-            url = f"{self.BASE_URL}/{location_slug}/search"
-        else:
-            url = f"{self.BASE_URL}/search"
-        
-        # Build query parameters
-        params = {"query": query}
-        
-        if min_price is not None:
-            params["minPrice"] = str(min_price)
-        
-        if max_price is not None:
-            params["maxPrice"] = str(max_price)
-        
-        if days_listed:
-            params["daysSinceListed"] = str(days_listed)
-        
-        if delivery_method:
-            params["deliveryMethod"] = delivery_method
-        
-        # Encode and append
-        query_string = urlencode(params)
-        return f"{url}?{query_string}"
+        return _search_url(
+            self.BASE_URL, query, min_price, max_price,
+            location, days_listed, delivery_method
+        )
     
     def build_item_url(self, item_id: str) -> str:
         """
@@ -83,6 +106,5 @@ class MarketplaceURLBuilder:
         Returns:
             Item ID or None
         """
-        import re
-        match = re.search(r'/marketplace/item/(\d+)', url)
+        match = _ITEM_RE.search(url)
         return match.group(1) if match else None
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Pre-generate query variations for the most searched queries.
+
+Runs them through the Message Batches API (about half the cost of live
+calls) and stores the results in the Redis variation cache that interactive
+searches read. Meant to run periodically, e.g. nightly from cron:
+
+    python scripts/warm_variations.py [limit]
+"""
+
+import asyncio
+import os
+import sys
+
+# Make the API package (apps/api/src) importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'apps', 'api'))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from src.db import init_db, close_db, get_pg_pool
+from src.services.search import SearchOrchestrator
+
+# Queries searched most in this window are warmed
+LOOKBACK_DAYS = 7
+DEFAULT_LIMIT = 50
+
+
+async def warm_variations(limit: int):
+    await init_db()
+    
+    try:
+        pool = get_pg_pool()
+        async with pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT query
+                FROM search_history
+                WHERE searched_at > NOW() - make_interval(days => $1)
+                GROUP BY query
+                ORDER BY COUNT(*) DESC
+                LIMIT $2
+            """, LOOKBACK_DAYS, limit)
+        
+        queries = [row['query'] for row in rows]
+        print(f'Warming variations for {len(queries)} popular queries...')
+        
+        warmed = await SearchOrchestrator().warm_variations(queries)
+        print(f'{warmed}/{len(queries)} queries have cached variations')
+    
+    except Exception as e:
+        print(f'Error: {e}')
+        sys.exit(1)
+    finally:
+        await close_db()
+
+if __name__ == '__main__':
+    asyncio.run(warm_variations(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LIMIT))